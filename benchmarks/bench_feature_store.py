@@ -0,0 +1,71 @@
+"""Magasin de matrices transformées : re-transformation du CSV contre ouverture en mmap.
+
+Pour chaque jeu, on mesure la lecture du CSV suivie de preprocessor.transform (ce que
+faisaient l'index des voisins, la matrice SHAP et l'explainer local), la matérialisation
+initiale du magasin, puis la réouverture de la matrice float32 (np.load en mmap, sans
+copie : seules les pages lues sont chargées, et partagées entre processus).
+
+Usage : python benchmarks/bench_feature_store.py [data/X_test.csv ...] [--repeat 5]
+"""
+import argparse
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from feature_store import materialize, matrix_dir, open_features  # noqa: E402
+from utils import get_preprocessor  # noqa: E402
+
+def median_ms(step, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        step()
+        timings.append((time.perf_counter() - start) * 1e3)
+    return float(np.median(timings))
+
+def transform_csv(preprocessor, path: str) -> np.ndarray:
+    """Référence : lecture du CSV et transformation complète, en float64."""
+    return np.asarray(preprocessor.transform(pd.read_csv(path)), dtype=np.float64)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sources", nargs="*", default=[
+        str(ROOT_DIR / "data" / f) for f in ("X_test.csv", "X_train.csv", "obesite_clean_fr.csv")])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model", default=str(ROOT_DIR / "models" / "modele_lgbm.pkl"))
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    preprocessor = get_preprocessor(joblib.load(args.model))
+    store_dir = tempfile.mkdtemp(prefix="feature_store_")
+    rows = []
+    for source in args.sources:
+        transform_ms = median_ms(lambda: transform_csv(preprocessor, source), args.repeat)
+        start = time.perf_counter()
+        materialize(preprocessor, source, matrix_dir(preprocessor, source, store_dir))
+        materialize_ms = (time.perf_counter() - start) * 1e3
+        open_ms = median_ms(lambda: open_features(preprocessor, source, store_dir), args.repeat)
+        features = open_features(preprocessor, source, store_dir)
+        rows.append({
+            "jeu": Path(source).name,
+            "matrice": "×".join(map(str, features.values.shape)),
+            "transform (ms)": round(transform_ms, 1),
+            "matérialisation (ms)": round(materialize_ms, 1),
+            "ouverture mmap (ms)": round(open_ms, 1),
+            "accélération": f"{transform_ms / open_ms:.0f}x",
+            "float32 (Mo)": round(features.values.nbytes / 1e6, 1),
+            "float64 re-transformé (Mo)": round(features.values.nbytes * 2 / 1e6, 1)
+        })
+    print(pd.DataFrame(rows).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Benchmark des graphiques de résultat (avant / après FigureFactory).
+
+Deux mesures par graphique : la construction seule, puis le chemin complet jusqu'au
+navigateur, construction suivie de st.plotly_chart (conversion de la figure, sérialisation
+JSON et identifiant de l'élément), appelé en mode nu comme hors de `streamlit run`.
+
+Usage : python benchmarks/bench_figures.py [--repeat 300]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+from streamlit.logger import set_log_level
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+# Importer streamlit enregistre son template Plotly, comme dans l'application
+import streamlit.elements.plotly_chart  # noqa: E402,F401
+from ui_components import FigureFactory  # noqa: E402
+from utils import get_obesity_labels_numeric  # noqa: E402
+
+
+def legacy_bmi_indicator(bmi: float) -> go.Figure:
+    """Version d'origine : figure complète reconstruite à chaque appel."""
+    if bmi < 18.5:
+        color, category = "#4CAF50", "Insuffisance pondérale"
+    elif bmi < 25:
+        color, category = "#8BC34A", "Poids normal"
+    elif bmi < 30:
+        color, category = "#FFC107", "Surpoids"
+    else:
+        color, category = "#F44336", "Obésité"
+
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=bmi,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': f"IMC: {category}", 'font': {'size': 18}},
+        number={'suffix': " kg/m²", 'font': {'size': 24}},
+        gauge={
+            'axis': {'range': [15, 40], 'tickwidth': 1},
+            'bar': {'color': color, 'thickness': 0.3},
+            'steps': [
+                {'range': [15, 18.5], 'color': "#E3F2FD"},
+                {'range': [18.5, 25], 'color': "#C8E6C9"},
+                {'range': [25, 30], 'color': "#FFF3E0"},
+                {'range': [30, 40], 'color': "#FFEBEE"}
+            ],
+            'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': bmi}
+        }
+    ))
+    fig.update_layout(height=250, margin=dict(l=20, r=20, t=40, b=20),
+                      paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+    return fig
+
+
+def legacy_gauge_chart(value: float, title: str, color: str) -> go.Figure:
+    """Version d'origine de la jauge générique."""
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=value,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': title, 'font': {'size': 20}},
+        gauge={
+            'axis': {'range': [None, 100]},
+            'bar': {'color': color},
+            'steps': [
+                {'range': [0, 25], 'color': "lightgray"},
+                {'range': [25, 50], 'color': "gray"},
+                {'range': [50, 75], 'color': "lightblue"},
+                {'range': [75, 100], 'color': "blue"}
+            ],
+            'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': 90}
+        }
+    ))
+    fig.update_layout(height=300, margin=dict(l=20, r=20, t=40, b=20),
+                      paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+    return fig
+
+
+def legacy_prediction_chart(probabilities: np.ndarray, labels) -> go.Figure:
+    """Version d'origine : DataFrame pandas trié pour sept valeurs."""
+    df = pd.DataFrame({
+        'Catégorie': [labels[i] for i in range(len(probabilities))],
+        'Probabilité': probabilities * 100
+    }).sort_values('Probabilité', ascending=True)
+    fig = go.Figure(data=[go.Bar(
+        y=df['Catégorie'], x=df['Probabilité'], orientation='h',
+        marker=dict(color=df['Probabilité'], colorscale='RdYlGn_r', showscale=False),
+        text=[f"{p:.1f}%" for p in df['Probabilité']], textposition='auto'
+    )])
+    fig.update_layout(title="Probabilités de classification", xaxis_title="Probabilité (%)",
+                      yaxis_title="Catégorie d'obésité", height=400,
+                      margin=dict(l=20, r=20, t=40, b=20),
+                      paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+    return fig
+
+
+def time_ms(func, repeat: int) -> float:
+    """Temps moyen d'un appel en millisecondes."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def displayed(build):
+    """Chemin complet d'un graphique : construction puis st.plotly_chart."""
+    return lambda: st.plotly_chart(build())
+
+
+def payload_bytes(fig: go.Figure) -> int:
+    """Taille du JSON envoyé au navigateur par st.plotly_chart."""
+    return len(pio.to_json(fig, validate=False).encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+    # Mode nu : les avertissements « missing ScriptRunContext » fausseraient les temps
+    # (niveau fixé après la lecture de la configuration, qui l'écraserait sinon)
+    st.config.get_option("logger.level")
+    set_log_level("error")
+
+    rng = np.random.default_rng(42)
+    probabilities = rng.dirichlet(np.ones(7))
+    labels = get_obesity_labels_numeric()
+
+    start = time.perf_counter()
+    factory = FigureFactory()
+    setup_ms = (time.perf_counter() - start) * 1e3
+
+    cases = [
+        ("create_bmi_indicator", lambda: legacy_bmi_indicator(27.3), lambda: factory.bmi_indicator(27.3)),
+        ("create_gauge_chart", lambda: legacy_gauge_chart(62.0, "Score", "#FF6B6B"),
+         lambda: factory.gauge(62.0, "Score", "#FF6B6B")),
+        ("create_prediction_chart", lambda: legacy_prediction_chart(probabilities, labels),
+         lambda: factory.prediction_chart(probabilities, labels)),
+    ]
+
+    print(f"Construction unique de la fabrique : {setup_ms:.1f} ms")
+    print(f"{'graphique':<26}{'avant (ms)':>12}{'après (ms)':>12}{'+ affichage avant':>19}"
+          f"{'+ affichage après':>19}{'avant (o)':>12}{'après (o)':>12}")
+    for name, before, after in cases:
+        print(f"{name:<26}{time_ms(before, args.repeat):>12.2f}{time_ms(after, args.repeat):>12.2f}"
+              f"{time_ms(displayed(before), args.repeat):>19.2f}{time_ms(displayed(after), args.repeat):>19.2f}"
+              f"{payload_bytes(before()):>12}{payload_bytes(after()):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark de l'index des profils similaires sur des populations synthétiques.
+
+Les lignes synthétiques sont tirées du dataset réel (dans l'espace du modèle) avec
+un léger bruit gaussien sur les variables numériques.
+
+Usage : python benchmarks/bench_neighbors.py --rows 10000000 [--model models/modele_lgbm.pkl]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from neighbors_index import NeighborsIndex, transform_profiles  # noqa: E402
+from utils import get_preprocessor  # noqa: E402
+
+def synthetic_vectors(base: np.ndarray, n_rows: int, n_numeric: int, seed: int = 42) -> np.ndarray:
+    """Rééchantillonne les vecteurs réels et bruite leurs composantes numériques."""
+    rng = np.random.default_rng(seed)
+    out = np.empty((n_rows, base.shape[1]), dtype=np.float32)
+    chunk = 1_000_000
+    for start in range(0, n_rows, chunk):
+        size = min(chunk, n_rows - start)
+        block = base[rng.integers(0, len(base), size)]
+        block[:, :n_numeric] += rng.normal(0, 0.05, (size, n_numeric)).astype(np.float32)
+        out[start:start + size] = block
+    return out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--model", default=str(ROOT_DIR / "models" / "modele_lgbm.pkl"))
+    parser.add_argument("--data", default=str(ROOT_DIR / "data" / "obesite_clean_fr.csv"))
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data)
+    preprocessor = get_preprocessor(joblib.load(args.model))
+    base, names = transform_profiles(preprocessor, data.drop(columns=["obesite_label"]))
+    n_numeric = sum(1 for n in preprocessor.get_feature_names_out() if n.startswith("num__")) - 1
+
+    vectors = synthetic_vectors(base, args.rows, n_numeric)
+    labels = np.random.default_rng(0).integers(0, 7, args.rows)
+
+    start = time.perf_counter()
+    index = NeighborsIndex.build(vectors, labels, np.arange(args.rows), list(range(7)), names)
+    build_s = time.perf_counter() - start
+    print(f"{args.rows:,} lignes, {index.meta['n_lists']} listes, n_probe={index.n_probe}, "
+          f"construction {build_s:.1f} s")
+
+    queries = synthetic_vectors(base, args.queries, n_numeric, seed=1)
+    latencies = np.empty(args.queries)
+    recall = []
+    for i, q in enumerate(queries):
+        t0 = time.perf_counter()
+        ids, _, _ = index.query(q, k=args.k)
+        latencies[i] = (time.perf_counter() - t0) * 1e3
+        if i < 20:
+            exact = np.argpartition(((vectors - q) ** 2).sum(axis=1), args.k)[:args.k]
+            recall.append(len(set(ids) & set(exact)) / args.k)
+
+    print(f"latence requête : p50 {np.percentile(latencies, 50):.3f} ms, "
+          f"p99 {np.percentile(latencies, 99):.3f} ms")
+    print(f"rappel@{args.k} (20 requêtes vérifiées en exhaustif) : {np.mean(recall):.2f}")
+
+if __name__ == "__main__":
+    main()
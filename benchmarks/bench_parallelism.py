@@ -0,0 +1,122 @@
+"""Temps de mur avec le budget de parallélisme contre la configuration naïve « tout à -1 ».
+
+Trois charges : une recherche d'hyper-paramètres LightGBM (RandomizedSearchCV), la
+calibration par plis, et des prédictions unitaires servies par un pool de threads comme
+dans l'application. La configuration naïve met n_jobs=-1 partout (recherche, calibration
+et LightGBM) ; le budget (src/parallelism.py) répartit les cœurs entre workers et threads.
+Les écarts n'apparaissent qu'avec plusieurs cœurs : OBESITE_CPUS permet de réduire le
+budget pour simuler une machine plus petite. Chaque charge est mesurée --repeat fois en
+alternant l'ordre des deux configurations (caches et fréquence CPU ne favorisent aucune
+d'elles) ; on retient la médiane.
+
+Usage : python benchmarks/bench_parallelism.py [--n-iter 6] [--cv 3] [--rows 4000] [--requests 400] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from imblearn.over_sampling import SMOTE
+from imblearn.pipeline import Pipeline as ImbPipeline
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.model_selection import RandomizedSearchCV, StratifiedKFold
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from build import _preprocessor  # noqa: E402
+from parallelism import available_cores, plan_parallelism, set_model_threads  # noqa: E402
+
+PARAM_DIST = {
+    "model__num_leaves": np.arange(20, 150, 10),
+    "model__learning_rate": np.linspace(0.01, 0.3, 30),
+    "model__min_child_samples": [10, 20, 30, 40, 50]
+}
+
+def timed(step) -> float:
+    start = time.perf_counter()
+    step()
+    return time.perf_counter() - start
+
+def median_pair(first, second, repeat: int):
+    """Médianes des temps de first et second, exécutées tour à tour dans un ordre alterné."""
+    timings = ([], [])
+    for run in range(repeat):
+        order = (0, 1) if run % 2 == 0 else (1, 0)
+        for i in order:
+            timings[i].append(timed((first, second)[i]))
+    return float(np.median(timings[0])), float(np.median(timings[1]))
+
+def make_pipeline(X: pd.DataFrame, threads: int) -> ImbPipeline:
+    return ImbPipeline([
+        ("preprocess", _preprocessor(X)),
+        ("smote", SMOTE(random_state=42)),
+        ("model", lgb.LGBMClassifier(objective="multiclass", class_weight="balanced", n_estimators=100,
+                                     random_state=42, n_jobs=threads, verbose=-1))
+    ])
+
+def search(X, y, n_iter: int, cv: int, workers: int, threads: int):
+    RandomizedSearchCV(make_pipeline(X, threads), PARAM_DIST, n_iter=n_iter, scoring="balanced_accuracy",
+                       cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=42),
+                       random_state=42, n_jobs=workers).fit(X, y)
+
+def calibrate(X, y, cv: int, workers: int, threads: int):
+    CalibratedClassifierCV(make_pipeline(X, threads), method="sigmoid", cv=cv, n_jobs=workers).fit(X, y)
+
+def serve(model, rows: pd.DataFrame, workers: int):
+    """Prédictions ligne à ligne soumises à un pool de threads, comme les sessions Streamlit."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda i: model.predict_proba(rows.iloc[[i]]), range(len(rows))))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-iter", type=int, default=6)
+    parser.add_argument("--cv", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=4000, help="Lignes de X_train pour l'entraînement")
+    parser.add_argument("--requests", type=int, default=400, help="Prédictions unitaires servies")
+    parser.add_argument("--repeat", type=int, default=3, help="Mesures par configuration, ordre alterné")
+    parser.add_argument("--model", default=str(ROOT_DIR / "models" / "modele_lgbm.pkl"))
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    X = pd.read_csv(ROOT_DIR / "data" / "X_train.csv")
+    y = pd.read_csv(ROOT_DIR / "data" / "y_train.csv").squeeze()
+    sample = X.sample(n=min(args.rows, len(X)), random_state=0).index
+    X, y = X.loc[sample].reset_index(drop=True), y.loc[sample].reset_index(drop=True)
+    requests = pd.read_csv(ROOT_DIR / "data" / "X_test.csv").sample(n=args.requests, replace=True, random_state=0)
+    model = joblib.load(args.model)
+
+    search_budget = plan_parallelism("recherche", tasks=args.n_iter * args.cv)
+    calibration_budget = plan_parallelism("calibration", tasks=args.cv)
+    inference_budget = plan_parallelism("inference")
+    print(f"Cœurs disponibles : {available_cores()}")
+
+    results = []
+    for name, naive, budgeted, budget in [
+        (f"Recherche ({args.n_iter} candidats × {args.cv} plis)",
+         lambda: search(X, y, args.n_iter, args.cv, -1, -1),
+         lambda: search(X, y, args.n_iter, args.cv, search_budget["workers"], search_budget["threads"]),
+         search_budget),
+        (f"Calibration ({args.cv} plis)",
+         lambda: calibrate(X, y, args.cv, -1, -1),
+         lambda: calibrate(X, y, args.cv, calibration_budget["workers"], calibration_budget["threads"]),
+         calibration_budget),
+        (f"Inférence ({args.requests} profils)",
+         lambda: serve(set_model_threads(model, -1), requests, inference_budget["workers"]),
+         lambda: serve(set_model_threads(model, inference_budget["threads"]), requests, inference_budget["workers"]),
+         inference_budget),
+    ]:
+        naive_s, budget_s = median_pair(naive, budgeted, args.repeat)
+        results.append({"charge": name, "tout à -1 (s)": round(naive_s, 2), "budget (s)": round(budget_s, 2),
+                        "workers × threads": f"{budget['workers']} × {budget['threads']}",
+                        "gain": f"{naive_s / budget_s:.2f}x"})
+    print(pd.DataFrame(results).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Durée de chaque interaction de la page Prédiction, avec le modèle réel.
+
+L'application est pilotée par streamlit.testing (AppTest) dans ce processus, après un
+préchauffage hors mesure ; chaque durée inclut les calculs d'arrière-plan lancés par
+l'interaction. Les appels au modèle par interaction sont vérifiés par tests/test_reruns.py.
+
+Usage : python benchmarks/bench_reruns.py
+"""
+import sys
+import time
+from concurrent.futures import wait
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import warmup  # noqa: E402
+
+APP_PATH = str(ROOT_DIR / "src" / "app_obesite.py")
+
+def settle(at: AppTest):
+    """Attend la fin des calculs d'arrière-plan, pour les imputer à l'interaction qui les a lancés."""
+    results = at.session_state["prediction_results"] if "prediction_results" in at.session_state else None
+    if results is not None and "renderer" in results:
+        wait([section["future"] for section in results["renderer"].sections])
+
+def main():
+    # Préchauffage hors mesure : l'application retrouve le modèle et les index en cache
+    warmup.warm_up(str(ROOT_DIR))
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    interactions = [
+        ("Chargement de la page", lambda: at.run()),
+        ("Analyser mon profil", lambda: at.button[0].click().run()),
+        ("Modifier le poids", lambda: at.number_input[2].set_value(95.0).run()),
+        ("Sauvegarder les résultats", lambda: at.button(key="save_results").click().run()),
+        ("Page Conseils", lambda: at.sidebar.radio[0].set_value("💡 Conseils").run()),
+        ("Retour à la page Prédiction", lambda: at.sidebar.radio[0].set_value("🔍 Prédiction").run()),
+    ]
+
+    print(f"{'Interaction':<30} {'durée (s)':>10}")
+    for name, interact in interactions:
+        start = time.perf_counter()
+        interact()
+        settle(at)
+        print(f"{name:<30} {time.perf_counter() - start:>10.2f}")
+        if at.exception:
+            print(f"❌ {name} : {at.exception[0].value}")
+
+if __name__ == "__main__":
+    main()
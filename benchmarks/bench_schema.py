@@ -0,0 +1,55 @@
+"""Benchmark du validateur de schéma sur des millions de lignes.
+
+Les lignes sont rééchantillonnées depuis le dataset réel ; une fraction est corrompue
+(valeurs hors bornes, modalités inconnues, texte dans une colonne numérique, cellules vides).
+
+Usage : python benchmarks/bench_schema.py --rows 5000000 [--corrupt 0.01]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from schema import validate_frame  # noqa: E402
+
+def synthetic_frame(base: pd.DataFrame, n_rows: int, corrupt: float, seed: int = 42) -> pd.DataFrame:
+    """Rééchantillonne le dataset et corrompt une fraction des lignes."""
+    rng = np.random.default_rng(seed)
+    frame = base.iloc[rng.integers(0, len(base), n_rows)].reset_index(drop=True)
+    n_bad = int(n_rows * corrupt)
+    if n_bad:
+        rows = rng.choice(n_rows, size=n_bad, replace=False)
+        kinds = np.array_split(rows, 4)
+        frame.loc[kinds[0], "poids_kg"] = 999.0
+        frame.loc[kinds[1], "transport"] = "Automobile"
+        frame["age"] = frame["age"].astype(object)
+        frame.loc[kinds[2], "age"] = "inconnu"
+        frame.loc[kinds[3], "eau_litres_jour"] = np.nan
+    return frame
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--corrupt", type=float, default=0.01)
+    parser.add_argument("--data", default=str(ROOT_DIR / "data" / "X_test.csv"))
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.data)
+    for label, corrupt in (("propre", 0.0), ("corrompu", args.corrupt)):
+        frame = synthetic_frame(base, args.rows, corrupt)
+        start = time.perf_counter()
+        result = validate_frame(frame)
+        elapsed = time.perf_counter() - start
+        print(f"{label:9s} : {args.rows:,} lignes en {elapsed:.2f} s "
+              f"({args.rows / elapsed / 1e6:.1f} M lignes/s), "
+              f"{int((~result.valid_rows).sum()):,} lignes invalides")
+    print(result.summary().to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Latence des courbes de sensibilité : grille évaluée en un lot contre un appel par point.
+
+Pour chaque taille de grille, on mesure compute_sensitivity (un seul predict_proba sur
+toutes les variables) puis la construction du graphique Plotly, et on la compare à
+l'évaluation point par point, comme le ferait une boucle naïve. L'objectif est de rester
+sous 100 ms pour quelques centaines de points.
+
+Usage : python benchmarks/bench_sensitivity.py [--points 10 20 50] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from sensitivity import SENSITIVITY_FEATURES, compute_sensitivity, feature_grid, scoring_model  # noqa: E402
+from ui_components import FigureFactory  # noqa: E402
+from utils import get_obesity_labels, prepare_input_data  # noqa: E402
+from warmup import row_to_user_inputs  # noqa: E402
+
+def median_ms(step, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        step()
+        timings.append((time.perf_counter() - start) * 1e3)
+    return float(np.median(timings))
+
+def point_by_point(model, user_inputs, n_points: int):
+    """Référence naïve : un profil préparé et prédit par point de grille."""
+    for feature, spec in SENSITIVITY_FEATURES.items():
+        for value in feature_grid(feature, float(user_inputs[spec["input"]]), n_points):
+            scoring_model(model).predict_proba(prepare_input_data(dict(user_inputs, **{spec["input"]: value})))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, nargs="+", default=[10, 20, 50],
+                        help="Points de grille par variable")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model", default=str(ROOT_DIR / "models" / "modele_lgbm.pkl"))
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    model = joblib.load(args.model)
+    user_inputs = row_to_user_inputs(pd.read_csv(ROOT_DIR / "data" / "X_test.csv").iloc[0])
+    factory = FigureFactory()
+    labels = get_obesity_labels()
+    classes = [c for c in labels if c in [str(k) for k in model.classes_]]
+    compute_sensitivity(model, user_inputs, n_points=10)
+
+    rows = []
+    for n_points in args.points:
+        curves = compute_sensitivity(model, user_inputs, n_points=n_points)
+        batch_ms = median_ms(lambda: compute_sensitivity(model, user_inputs, n_points=n_points), args.repeat)
+        chart_ms = median_ms(lambda: factory.sensitivity_chart(curves, classes, labels, SENSITIVITY_FEATURES),
+                             args.repeat)
+        naive_ms = median_ms(lambda: point_by_point(model, user_inputs, n_points), 1)
+        rows.append({
+            "points": len(curves),
+            "lot (ms)": round(batch_ms, 1),
+            "graphique (ms)": round(chart_ms, 1),
+            "total (ms)": round(batch_ms + chart_ms, 1),
+            "point par point (ms)": round(naive_ms, 1),
+            "accélération": f"{naive_ms / batch_ms:.0f}x"
+        })
+    print(pd.DataFrame(rows).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Mémoire du dataset pour N sessions simultanées : st.cache_data contre le handle partagé.
+
+st.cache_data sérialise le DataFrame et en désérialise une copie à chaque appel ; on
+reproduit ce comportement avec pickle et on garde les N copies vivantes, comme N sessions
+ouvertes. load_shared_data (st.cache_resource) renvoie à toutes le même objet compact.
+
+Usage : python benchmarks/bench_shared_data.py [--sessions 100]
+"""
+import argparse
+import pickle
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from utils import compact_frame  # noqa: E402
+
+def traced_mb(build) -> float:
+    """Mémoire allouée (Mo) par les objets que build() retourne et garde vivants."""
+    tracemalloc.start()
+    kept = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--data", default=str(ROOT_DIR / "data" / "obesite_clean_fr.csv"))
+    args = parser.parse_args()
+
+    raw = pd.read_csv(args.data)
+    compact = compact_frame(raw)
+    raw_mb = raw.memory_usage(deep=True).sum() / 1e6
+    compact_mb = compact.memory_usage(deep=True).sum() / 1e6
+    print(f"DataFrame d'origine : {raw_mb:.2f} Mo ; version compacte : {compact_mb:.2f} Mo "
+          f"({raw_mb / compact_mb:.1f}x plus petite)")
+    print(compact.dtypes.astype(str).value_counts().to_string())
+
+    payload = pickle.dumps(raw)
+    copies_mb = traced_mb(lambda: [pickle.loads(payload) for _ in range(args.sessions)])
+    shared_mb = traced_mb(lambda: [compact] * args.sessions) + compact_mb
+
+    print(f"\n{args.sessions} sessions, st.cache_data (une copie par session) : {copies_mb:.1f} Mo")
+    print(f"{args.sessions} sessions, load_shared_data (un objet partagé)     : {shared_mb:.1f} Mo")
+    print(f"Économie par session : {(copies_mb - shared_mb) / args.sessions:.2f} Mo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Montée en charge sur populations synthétiques : génération, cube d'analyse et scoring par lots.
+
+Les populations sont tirées par SyntheticPopulation (src/synthetic.py), apprise sur
+obesite_clean_fr.csv, avec une graine fixe : deux exécutions mesurent les mêmes lignes.
+Le scoring ne porte que sur les --score-rows premières lignes de chaque population.
+
+Usage : python benchmarks/bench_synthetic.py --rows 100000 1000000 [--chunk-size 500000]
+"""
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from analysis_cube import AnalysisCube  # noqa: E402
+from synthetic import TARGET, SyntheticPopulation  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    parser.add_argument("--score-rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--model", default=str(ROOT_DIR / "models" / "modele_lgbm.pkl"))
+    parser.add_argument("--data", default=str(ROOT_DIR / "data" / "obesite_clean_fr.csv"))
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    start = time.perf_counter()
+    population = SyntheticPopulation.fit(pd.read_csv(args.data))
+    print(f"Apprentissage de la population : {(time.perf_counter() - start) * 1e3:.0f} ms")
+    model = joblib.load(args.model)
+
+    results = []
+    for n_rows in args.rows:
+        start = time.perf_counter()
+        chunks = list(population.generate(n_rows, args.chunk_size, args.seed))
+        generate_s = time.perf_counter() - start
+
+        data = pd.concat(chunks, ignore_index=True)
+        start = time.perf_counter()
+        cube = AnalysisCube.from_dataframe(data)
+        cube_s = time.perf_counter() - start
+
+        scored = data.drop(columns=[TARGET]).head(args.score_rows)
+        start = time.perf_counter()
+        for offset in range(0, len(scored), args.chunk_size):
+            model.predict_proba(scored.iloc[offset:offset + args.chunk_size])
+        score_s = time.perf_counter() - start
+
+        results.append({
+            "lignes": f"{n_rows:,}",
+            "génération + schéma (lignes/s)": f"{n_rows / generate_s:,.0f}",
+            "cube (s)": round(cube_s, 2),
+            "cellules du cube": cube.counts.size,
+            "scoring (lignes/s)": f"{len(scored) / score_s:,.0f}",
+            "mémoire (Mo)": round(data.memory_usage(deep=True).sum() / 1e6, 1)
+        })
+        del chunks, data
+    print(pd.DataFrame(results).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Dict, List, Optional, Sequence
+
+try:
+    from utils import load_shared_data
+except ImportError:
+    from src.utils import load_shared_data
+
+# Découpage des dimensions continues : bornes inférieures et libellés
+AGE_BANDS = ([0, 20, 30, 40, 50], ["< 20 ans", "20-29 ans", "30-39 ans", "40-49 ans", "50 ans et +"])
+BMI_BANDS = (
+    [0, 18.5, 25, 30, 35, 40],
+    ["< 18.5", "18.5-24.9", "25-29.9", "30-34.9", "35-39.9", "≥ 40"]
+)
+
+# Ordre de sévérité des classes, identique à get_obesity_labels
+LABEL_ORDER = [
+    "Insuffisance_Ponderale", "Poids_Normal", "Surpoids_Niveau_I", "Surpoids_Niveau_II",
+    "Obesite_Type_I", "Obesite_Type_II", "Obesite_Type_III"
+]
+
+# Dimensions du cube, dans l'ordre des axes (la classe est toujours le dernier axe)
+DIMENSIONS = ["genre", "tranche_age", "transport", "alcool", "grignotage", "tranche_imc", "obesite_label"]
+
+DIMENSION_LABELS = {
+    "genre": "Genre",
+    "tranche_age": "Tranche d'âge",
+    "transport": "Transport",
+    "alcool": "Alcool",
+    "grignotage": "Grignotage",
+    "tranche_imc": "Tranche d'IMC",
+    "obesite_label": "Classe d'obésité"
+}
+
+def bucketize(values: np.ndarray, bands) -> np.ndarray:
+    """Retourne l'indice de tranche de chaque valeur."""
+    edges, _ = bands
+    return np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(edges) - 1)
+
+def _encode(values: pd.Series, categories: Sequence[str]) -> np.ndarray:
+    """Encode une colonne catégorielle selon un ordre de modalités fixé."""
+    return pd.Categorical(values, categories=categories).codes.astype(np.intp)
+
+class AnalysisCube:
+    """Cube OLAP des effectifs par combinaison de dimensions discrétisées."""
+
+    def __init__(self, counts: np.ndarray, categories: Dict[str, List[str]]):
+        self.counts = counts
+        self.categories = categories
+        self.counts.setflags(write=False)
+
+    @classmethod
+    def from_dataframe(cls, data: pd.DataFrame) -> "AnalysisCube":
+        """Construit le cube en un seul passage sur les données."""
+        bmi = data["poids_kg"].to_numpy(dtype=float) / data["taille_m"].to_numpy(dtype=float) ** 2
+        categories = {
+            "genre": sorted(data["genre"].dropna().unique()),
+            "tranche_age": list(AGE_BANDS[1]),
+            "transport": sorted(data["transport"].dropna().unique()),
+            "alcool": sorted(data["alcool"].dropna().unique()),
+            "grignotage": sorted(data["grignotage"].dropna().unique()),
+            "tranche_imc": list(BMI_BANDS[1]),
+            "obesite_label": [l for l in LABEL_ORDER if l in set(data["obesite_label"])]
+        }
+
+        codes = [
+            _encode(data["genre"], categories["genre"]),
+            bucketize(data["age"].to_numpy(dtype=float), AGE_BANDS),
+            _encode(data["transport"], categories["transport"]),
+            _encode(data["alcool"], categories["alcool"]),
+            _encode(data["grignotage"], categories["grignotage"]),
+            bucketize(bmi, BMI_BANDS),
+            _encode(data["obesite_label"], categories["obesite_label"])
+        ]
+        shape = tuple(len(categories[dim]) for dim in DIMENSIONS)
+
+        # Les lignes avec une modalité manquante ou inconnue (code -1) sont écartées
+        valid = np.logical_and.reduce([c >= 0 for c in codes])
+        flat = np.ravel_multi_index([c[valid] for c in codes], shape)
+        counts = np.bincount(flat, minlength=int(np.prod(shape))).astype(np.int32).reshape(shape)
+        return cls(counts, categories)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def query(self, filters: Optional[Dict[str, Sequence[str]]] = None,
+              group_by: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Retourne les effectifs filtrés, agrégés selon les dimensions de group_by.
+
+        Les filtres associent une dimension à la liste des modalités retenues ; une
+        liste vide ou absente conserve toutes les modalités.
+        """
+        filters = filters or {}
+        group_by = list(group_by or [])
+        unknown = (set(filters) | set(group_by)) - set(DIMENSIONS)
+        if unknown:
+            raise KeyError(f"Dimensions inconnues: {sorted(unknown)}")
+
+        indexers = []
+        for dim in DIMENSIONS:
+            selected = filters.get(dim)
+            if selected:
+                indexers.append([i for i, v in enumerate(self.categories[dim]) if v in selected])
+            else:
+                indexers.append(slice(None))
+
+        sub = self.counts
+        for axis, indexer in enumerate(indexers):
+            if not isinstance(indexer, slice):
+                sub = sub.take(indexer, axis=axis)
+
+        kept_axes = [DIMENSIONS.index(dim) for dim in group_by]
+        summed_axes = tuple(a for a in range(len(DIMENSIONS)) if a not in kept_axes)
+        result = sub.sum(axis=summed_axes)
+        # sum conserve l'ordre des axes du cube : on réordonne selon group_by
+        order = np.argsort(np.argsort(kept_axes))
+        return np.transpose(result, order) if result.ndim > 1 else result
+
+    def selected_categories(self, dim: str, filters: Optional[Dict[str, Sequence[str]]] = None) -> List[str]:
+        """Modalités d'une dimension restantes après filtrage."""
+        selected = (filters or {}).get(dim)
+        if not selected:
+            return list(self.categories[dim])
+        return [v for v in self.categories[dim] if v in selected]
+
+    def to_frame(self, filters: Optional[Dict[str, Sequence[str]]] = None,
+                 group_by: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Résultat de query au format long, prêt pour Plotly."""
+        group_by = list(group_by or [])
+        counts = self.query(filters, group_by)
+        if not group_by:
+            return pd.DataFrame({"effectif": [int(counts)]})
+        index = pd.MultiIndex.from_product(
+            [self.selected_categories(dim, filters) for dim in group_by], names=group_by
+        )
+        return pd.DataFrame({"effectif": counts.ravel()}, index=index).reset_index()
+
+@st.cache_resource
+def load_analysis_cube(data_path: str) -> AnalysisCube:
+    """Construit le cube d'analyse une seule fois par processus."""
+    return AnalysisCube.from_dataframe(load_shared_data(data_path))
@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 from pathlib import Path
 import sys
 import os
@@ -14,29 +13,57 @@ sys.path.insert(0, str(current_dir))
 # Imports avec gestion d'erreur
 try:
     from utils import (
-        load_model, load_data, prepare_input_data, 
-        get_obesity_labels, get_obesity_labels_numeric, get_risk_color, validate_inputs,
-        calculate_bmi, get_bmi_category
+        load_shared_data, get_obesity_labels, get_obesity_labels_numeric,
+        validate_inputs, get_preprocessor
     )
-    from advice_engine import AdviceEngine
+    from warmup import load_app_resources, warm_up, app_paths
     from ui_components import (
-        create_gauge_chart, create_bmi_indicator, create_prediction_chart,
-        display_shap_explanation, create_risk_assessment_card, create_advice_cards,
-        create_progress_tracker, display_model_info, create_input_form
+        create_bmi_indicator, create_prediction_chart, create_risk_assessment_card, create_advice_cards,
+        create_progress_tracker, display_model_info, create_input_form,
+        create_analysis_filters, display_similar_profiles, display_shap_explorer,
+        display_counterfactuals, display_local_explanation, display_shap_fallback,
+        create_sensitivity_chart, display_evaluation_report
     )
+    from prediction import predict_profile, compute_counterfactuals
+    from counterfactuals import has_lower_target
+    from schema import SchemaError
+    from shap_store import load_shap_store, load_local_explainer, explain_instance
+    from progressive import ProgressiveRenderer
+    from sensitivity import SENSITIVITY_FEATURES, compute_sensitivity
+    from evaluation import load_evaluation_report
+    from neighbors_index import load_neighbors_index, find_similar_profiles
+    from analysis_cube import load_analysis_cube, DIMENSION_LABELS
 except ImportError:
     # Fallback pour les imports avec préfixe src
     from src.utils import (
-        load_model, load_data, prepare_input_data, 
-        get_obesity_labels, get_obesity_labels_numeric, get_risk_color, validate_inputs,
-        calculate_bmi, get_bmi_category
+        load_shared_data, get_obesity_labels, get_obesity_labels_numeric,
+        validate_inputs, get_preprocessor
     )
-    from src.advice_engine import AdviceEngine
+    from src.warmup import load_app_resources, warm_up, app_paths
     from src.ui_components import (
-        create_gauge_chart, create_bmi_indicator, create_prediction_chart,
-        display_shap_explanation, create_risk_assessment_card, create_advice_cards,
-        create_progress_tracker, display_model_info, create_input_form
+        create_bmi_indicator, create_prediction_chart, create_risk_assessment_card, create_advice_cards,
+        create_progress_tracker, display_model_info, create_input_form,
+        create_analysis_filters, display_similar_profiles, display_shap_explorer,
+        display_counterfactuals, display_local_explanation, display_shap_fallback,
+        create_sensitivity_chart, display_evaluation_report
     )
+    from src.prediction import predict_profile, compute_counterfactuals
+    from src.counterfactuals import has_lower_target
+    from src.schema import SchemaError
+    from src.shap_store import load_shap_store, load_local_explainer, explain_instance
+    from src.progressive import ProgressiveRenderer
+    from src.sensitivity import SENSITIVITY_FEATURES, compute_sensitivity
+    from src.evaluation import load_evaluation_report
+    from src.neighbors_index import load_neighbors_index, find_similar_profiles
+    from src.analysis_cube import load_analysis_cube, DIMENSION_LABELS
+
+# Délai maximal (secondes) de chaque section calculée en arrière-plan après la prédiction
+BACKGROUND_TIMEOUTS = {
+    "sensitivity": 3.0,
+    "explanation": 6.0,
+    "counterfactuals": 3.0,
+    "neighbors": 3.0
+}
 
 # Configuration de la page
 st.set_page_config(
@@ -115,22 +142,20 @@ def main():
         - Promouvoir un mode de vie sain
         """)
     
-    # Chargement des ressources
-    @st.cache_resource
-    def load_resources():
-        # Chemin relatif au répertoire parent depuis src/
-        model_path = os.path.join(parent_dir, "models", "modele_lgbm.pkl")
-        model = load_model(model_path)
-        advice_engine = AdviceEngine()
-        return model, advice_engine
-    
+    # Chargement des ressources (préchauffées une fois par processus, voir warmup.py)
     try:
-        model, advice_engine = load_resources()
+        model, advice_engine = load_app_resources(os.path.join(parent_dir, "models", "modele_lgbm.pkl"))
         
         if model is None:
             st.error("❌ Impossible de charger le modèle. Vérifiez que le fichier 'models/modele_lgbm.pkl' existe.")
             return
         
+        # Le premier visiteur d'un processus non préchauffé attend ici la fin du préchauffage
+        with st.spinner("⏳ Préparation de l'application..."):
+            warmup_timings = warm_up(str(parent_dir))
+        if 'erreur' in warmup_timings:
+            st.warning(f"⚠️ Préchauffage incomplet: {warmup_timings['erreur']}")
+        
         # Navigation par pages
         if page == "🔍 Prédiction":
             prediction_page(model, advice_engine)
@@ -157,6 +182,7 @@ def prediction_page(model, advice_engine):
     with col2:
         predict_button = st.button("🔮 Analyser mon profil", use_container_width=True)
     
+    # Le modèle n'est appelé qu'ici : les autres interactions réaffichent le résultat conservé
     if predict_button:
         # Validation des entrées
         is_valid, error_message = validate_inputs(user_inputs)
@@ -165,97 +191,194 @@ def prediction_page(model, advice_engine):
             st.error(f"❌ {error_message}")
             return
         
-        # Prédiction
-        with st.spinner("🔄 Analyse en cours..."):
-            try:
-                # Préparer les données
-                input_data = prepare_input_data(user_inputs)
-                
-                # Faire la prédiction
-                prediction = model.predict(input_data)[0]
-                probabilities = model.predict_proba(input_data)[0]
-                
-                # Obtenir les labels
-                obesity_labels = get_obesity_labels()
-                
-                # Gérer les prédictions string ou numériques
-                if isinstance(prediction, str):
-                    predicted_label = obesity_labels.get(prediction, prediction)
-                    # Convertir la prédiction string en index pour les couleurs et métriques
-                    model_classes = list(model.classes_) if hasattr(model, 'classes_') else []
-                    prediction_index = model_classes.index(prediction) if prediction in model_classes else 0
-                else:
-                    # Prédiction numérique (fallback)
-                    numeric_labels = get_obesity_labels_numeric()
-                    predicted_label = numeric_labels.get(prediction, f"Classe {prediction}")
-                    prediction_index = prediction
-                
-                risk_color = get_risk_color(prediction_index)
-                
-                # Calculer l'IMC
-                bmi = calculate_bmi(user_inputs['poids_kg'], user_inputs['taille_m'])
-                bmi_category = get_bmi_category(bmi)
-                
-                # Affichage des résultats
-                st.success("✅ Analyse terminée!")
-                
-                # Métriques principales
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.metric(
-                        label="🎯 Prédiction",
-                        value=predicted_label,
-                        delta=f"Confiance: {probabilities[prediction_index]*100:.1f}%"
-                    )
-                
-                with col2:
-                    st.metric(
-                        label="📊 IMC",
-                        value=f"{bmi:.1f} kg/m²",
-                        delta=bmi_category
-                    )
-                
-                with col3:
-                    risk_level = "Faible" if prediction_index <= 1 else "Modéré" if prediction_index <= 3 else "Élevé"
-                    st.metric(
-                        label="⚠️ Niveau de risque",
-                        value=risk_level,
-                        delta=f"Classe {prediction_index}"
-                    )
-                
-                # Graphiques
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Graphique IMC
-                    bmi_fig = create_bmi_indicator(bmi)
-                    st.plotly_chart(bmi_fig, use_container_width=True)
-                
-                with col2:
-                    # Graphique des probabilités - utiliser les labels numériques
-                    numeric_labels = get_obesity_labels_numeric()
-                    prob_fig = create_prediction_chart(probabilities, numeric_labels)
-                    st.plotly_chart(prob_fig, use_container_width=True)
-                
-                # Facteurs de risque et conseils
-                st.markdown("### 📋 Évaluation des facteurs")
-                risk_factors = advice_engine.get_risk_factors(user_inputs)
-                protective_factors = advice_engine.get_protective_factors(user_inputs)
-                create_risk_assessment_card(risk_factors, protective_factors)
-                
-                # Conseils personnalisés
-                st.markdown("### 💡 Recommandations personnalisées")
-                advice = advice_engine.get_personalized_advice(prediction_index, user_inputs)
-                create_advice_cards(advice)
-                
-                # Sauvegarde des résultats (optionnel)
-                if st.button("💾 Sauvegarder les résultats"):
-                    save_results(user_inputs, prediction_index, predicted_label, bmi)
-                
-            except Exception as e:
-                st.error(f"❌ Erreur lors de la prédiction: {e}")
-                st.info("Vérifiez vos données et réessayez.")
+        try:
+            with st.spinner("🔄 Analyse en cours..."):
+                result = predict_profile(model, user_inputs)
+        except SchemaError as e:
+            st.error(f"❌ Données incompatibles avec le modèle: {e}")
+            return
+        except Exception as e:
+            st.error(f"❌ Erreur lors de la prédiction: {e}")
+            st.info("Vérifiez vos données et réessayez.")
+            return
+        # Seul le résultat brut est conservé ici : le reste est complété après les métriques
+        st.session_state["prediction_results"] = {'user_inputs': user_inputs, 'result': result}
+    
+    results = st.session_state.get("prediction_results")
+    if results is None:
+        return
+    if results['user_inputs'] != user_inputs:
+        st.info("✏️ Vos réponses ont changé depuis cette analyse : "
+                "cliquez sur « Analyser mon profil » pour la mettre à jour.")
+    
+    try:
+        display_prediction_results(model, advice_engine, results)
+    except Exception as e:
+        st.error(f"❌ Erreur lors de la prédiction: {e}")
+        st.info("Vérifiez vos données et réessayez.")
+
+def complete_results(model, advice_engine, results):
+    """Complète une prédiction conservée : sections lentes, graphiques et conseils.
+
+    Appelée une fois les métriques affichées. Le dictionnaire complété reste dans
+    st.session_state : les reruns suivants réaffichent la page sans rappeler le modèle.
+    """
+    if 'renderer' in results:
+        return
+    result, user_inputs = results['result'], results['user_inputs']
+    prediction_index = result['prediction_index']
+    results.update({
+        # Sections lentes lancées d'abord : elles avancent pendant la construction du reste
+        'renderer': start_background_sections(model, user_inputs, result['input_data'], result['prediction']),
+        'bmi_fig': create_bmi_indicator(result['bmi']),
+        # Graphique des probabilités - utiliser les labels numériques
+        'prob_fig': create_prediction_chart(result['probabilities'], get_obesity_labels_numeric()),
+        'risk_factors': advice_engine.get_risk_factors(user_inputs),
+        'protective_factors': advice_engine.get_protective_factors(user_inputs),
+        'advice': advice_engine.get_personalized_advice(prediction_index, user_inputs)
+    })
+
+@st.fragment
+def display_prediction_results(model, advice_engine, results):
+    """Affiche une prédiction conservée ; le bouton de sauvegarde ne relance que ce fragment.
+
+    Les métriques ne dépendent que des probabilités : elles s'affichent avant que
+    complete_results ne prépare le reste de la page.
+    """
+    result = results['result']
+    probabilities = result['probabilities']
+    predicted_label = result['predicted_label']
+    prediction_index = result['prediction_index']
+    bmi, bmi_category = result['bmi'], result['bmi_category']
+    
+    # Affichage des résultats
+    st.success("✅ Analyse terminée!")
+    
+    # Métriques principales
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric(
+            label="🎯 Prédiction",
+            value=predicted_label,
+            delta=f"Confiance: {probabilities[prediction_index]*100:.1f}%"
+        )
+    
+    with col2:
+        st.metric(
+            label="📊 IMC",
+            value=f"{bmi:.1f} kg/m²",
+            delta=bmi_category
+        )
+    
+    with col3:
+        risk_level = "Faible" if prediction_index <= 1 else "Modéré" if prediction_index <= 3 else "Élevé"
+        st.metric(
+            label="⚠️ Niveau de risque",
+            value=risk_level,
+            delta=f"Classe {prediction_index}"
+        )
+    
+    if result.get('range_warnings'):
+        st.warning("⚠️ Valeurs hors de celles vues à l'entraînement, prédiction moins fiable : "
+                   + "; ".join(result['range_warnings']))
+    
+    complete_results(model, advice_engine, results)
+    
+    # Graphiques
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.plotly_chart(results['bmi_fig'], use_container_width=True)
+    
+    with col2:
+        st.plotly_chart(results['prob_fig'], use_container_width=True)
+    
+    # Facteurs de risque et conseils
+    st.markdown("### 📋 Évaluation des facteurs")
+    create_risk_assessment_card(results['risk_factors'], results['protective_factors'])
+    
+    # Conseils personnalisés
+    st.markdown("### 💡 Recommandations personnalisées")
+    create_advice_cards(results['advice'])
+    
+    # Sensibilité, explication, contrefactuels et profils similaires, affichés dès qu'ils sont prêts
+    results['renderer'].render()
+    
+    # Sauvegarde des résultats (optionnel)
+    if st.button("💾 Sauvegarder les résultats", key="save_results"):
+        save_results(results['user_inputs'], prediction_index, predicted_label, bmi)
+
+def display_sensitivity(curves, labels):
+    """Courbes de sensibilité des variables choisies, filtrées sans rappeler le modèle."""
+    selected = st.multiselect(
+        "Variables à faire varier",
+        list(SENSITIVITY_FEATURES),
+        default=list(SENSITIVITY_FEATURES),
+        format_func=lambda f: SENSITIVITY_FEATURES[f]['label'],
+        key="sensitivity_features"
+    )
+    if selected:
+        classes = [c for c in labels if c in curves.columns]
+        st.plotly_chart(create_sensitivity_chart(
+            curves[curves['variable'].isin(selected)], classes, labels,
+            {f: SENSITIVITY_FEATURES[f] for f in selected}
+        ), use_container_width=True)
+
+def start_background_sections(model, user_inputs, input_data, prediction) -> ProgressiveRenderer:
+    """Lance en arrière-plan la sensibilité, l'explication SHAP, les contrefactuels et les profils similaires."""
+    data_path = os.path.join(parent_dir, "data", "obesite_clean_fr.csv")
+    store_dir = os.path.join(parent_dir, "models", "features")
+    fallback_image = os.path.join(parent_dir, "assets", "shap_summary_named.png")
+    labels = get_obesity_labels()
+    renderer = ProgressiveRenderer()
+    
+    # Courbes de toutes les variables en un appel : le choix des variables ne rappelle pas le modèle
+    renderer.submit(
+        "### 📉 Et si une seule habitude changeait ?",
+        lambda: compute_sensitivity(model, user_inputs),
+        lambda curves: display_sensitivity(curves, labels),
+        lambda reason: st.info(f"Courbes de sensibilité indisponibles: {reason}"),
+        BACKGROUND_TIMEOUTS["sensitivity"]
+    )
+    
+    if isinstance(prediction, str):
+        renderer.submit(
+            "### 🧠 Pourquoi cette prédiction ?",
+            lambda: explain_instance(load_local_explainer(model, data_path, store_dir), model, input_data, prediction),
+            lambda contributions: display_local_explanation(contributions, labels.get(prediction, prediction)),
+            lambda reason: display_shap_fallback(fallback_image, reason),
+            BACKGROUND_TIMEOUTS["explanation"]
+        )
+    # À partir de « Poids normal », il n'y a pas de classe plus favorable à viser
+    if isinstance(prediction, str) and has_lower_target(prediction):
+        renderer.submit(
+            "### 🎯 Ce qui pourrait faire baisser votre classe",
+            lambda: compute_counterfactuals(model, user_inputs, prediction),
+            lambda suggestions: display_counterfactuals(suggestions, labels),
+            lambda reason: st.info(f"Suggestions indisponibles: {reason}"),
+            BACKGROUND_TIMEOUTS["counterfactuals"]
+        )
+    
+    # L'index et le dataset sont résolus ici : leur premier chargement peut afficher un spinner
+    try:
+        index = load_neighbors_index(model, data_path, os.path.join(parent_dir, "models", "neighbors_index"),
+                                     store_dir)
+        data = load_shared_data(data_path)
+        compute_neighbors = lambda: find_similar_profiles(index, get_preprocessor(model), input_data, data)
+    except Exception as e:
+        compute_neighbors = lambda error=e: _raise(error)
+    renderer.submit(
+        "### 👥 Profils similaires",
+        compute_neighbors,
+        lambda result: display_similar_profiles(*result, labels),
+        lambda reason: st.info(f"Profils similaires indisponibles: {reason}"),
+        BACKGROUND_TIMEOUTS["neighbors"]
+    )
+    return renderer
+
+def _raise(error: Exception):
+    raise error
 
 def analysis_page(model):
     """Page d'analyse des données."""
@@ -264,7 +387,7 @@ def analysis_page(model):
     # Charger les données d'entraînement si disponibles
     try:
         data_path = os.path.join(parent_dir, "data", "obesite_clean_fr.csv")
-        data = load_data(data_path)
+        data = load_shared_data(data_path)
         
         if not data.empty:
             st.markdown("### 📊 Statistiques du dataset")
@@ -280,16 +403,25 @@ def analysis_page(model):
             with col4:
                 st.metric("🎯 Classes", data['obesite_label'].nunique() if 'obesite_label' in data.columns else "N/A")
             
-            # Distribution des classes
+            # Distribution des classes, calculée à partir du cube pré-agrégé
             if 'obesite_label' in data.columns:
                 st.markdown("### 📊 Distribution des classes d'obésité")
-                class_dist = data['obesite_label'].value_counts().sort_index()
+                cube = load_analysis_cube(data_path)
+                filters, breakdown = create_analysis_filters(cube.categories, DIMENSION_LABELS)
+                
+                group_by = ['obesite_label'] + ([breakdown] if breakdown else [])
+                class_dist = cube.to_frame(filters, group_by)
+                class_dist['obesite_label'] = class_dist['obesite_label'].map(get_obesity_labels())
+                st.caption(f"{int(class_dist['effectif'].sum())} échantillons sélectionnés sur {cube.total}")
                 
                 import plotly.express as px
                 fig = px.bar(
-                    x=class_dist.index,
-                    y=class_dist.values,
-                    labels={'x': 'Classe d\'obésité', 'y': 'Nombre d\'échantillons'},
+                    class_dist,
+                    x='obesite_label',
+                    y='effectif',
+                    color=breakdown,
+                    labels={'obesite_label': 'Classe d\'obésité', 'effectif': 'Nombre d\'échantillons',
+                            **({breakdown: DIMENSION_LABELS[breakdown]} if breakdown else {})},
                     title="Répartition des classes dans le dataset"
                 )
                 st.plotly_chart(fig, use_container_width=True)
@@ -304,8 +436,22 @@ def analysis_page(model):
     except Exception as e:
         st.error(f"❌ Erreur lors du chargement des données: {e}")
     
-    # Informations sur le modèle
-    display_model_info()
+    # Importance des variables à partir de la matrice SHAP pré-calculée
+    st.markdown("### 🧠 Importance des caractéristiques (SHAP)")
+    display_shap_explorer(
+        load_shap_store(model, os.path.join(parent_dir, "assets", "shap_values")),
+        get_obesity_labels(),
+        os.path.join(parent_dir, "assets", "shap_summary_named.png")
+    )
+    
+    # Performances du modèle déployé, lues dans le rapport mis en cache (une évaluation par modèle)
+    st.markdown("### 📏 Performances du modèle sur le jeu de test")
+    try:
+        paths = app_paths(str(parent_dir))
+        report = load_evaluation_report(model, paths['model'], paths['samples'], paths['labels'], paths['evaluation'])
+        display_evaluation_report(report, get_obesity_labels())
+    except Exception as e:
+        st.warning(f"⚠️ Rapport d'évaluation indisponible: {e}")
 
 def advice_page(advice_engine):
     """Page dédiée aux conseils généraux."""
@@ -419,8 +565,14 @@ def about_page():
     display_model_info()
 
 def save_results(user_inputs, prediction, predicted_label, bmi):
-    """Sauvegarde les résultats de l'analyse (fonctionnalité future)."""
-    st.success("💾 Résultats sauvegardés! (Fonctionnalité à venir)")
+    """Sauvegarde les résultats affichés dans la session (suivi dans le temps : fonctionnalité future)."""
+    st.session_state.setdefault("saved_results", []).append({
+        'user_inputs': dict(user_inputs),
+        'prediction': prediction,
+        'predicted_label': predicted_label,
+        'bmi': bmi
+    })
+    st.success(f"💾 Résultats sauvegardés : {predicted_label}, IMC {bmi:.1f} kg/m²")
     st.info("Dans une version future, vous pourrez sauvegarder et suivre vos résultats dans le temps.")
 
 if __name__ == "__main__":
@@ -0,0 +1,603 @@
+import ast
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import textwrap
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Set
+
+try:
+    from parallelism import CORES_ENV, available_cores
+    from utils import hash_path
+except ImportError:
+    from src.parallelism import CORES_ENV, available_cores
+    from src.utils import hash_path
+
+RANDOM_STATE = 42
+# Modules importables par les étapes (leur code fait partie de l'empreinte)
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Dictionnaires de traduction du notebook (étape 1)
+RENAME_COLUMNS = {
+    "id": "identifiant",
+    "Gender": "genre",
+    "Age": "age",
+    "Height": "taille_m",
+    "Weight": "poids_kg",
+    "family_history_with_overweight": "antecedents_surpoids_famille",
+    "FAVC": "consommation_frequent_calorique",
+    "FCVC": "frequence_legumes",
+    "NCP": "nombre_repas_jour",
+    "CAEC": "grignotage",
+    "SMOKE": "fumeur",
+    "CH2O": "eau_litres_jour",
+    "SCC": "suivi_calories",
+    "FAF": "activite_physique_hebdo",
+    "TUE": "temps_ecran",
+    "CALC": "alcool",
+    "MTRANS": "transport",
+    "0be1dad": "obesite_label"
+}
+FREQUENCY_MAP = {"Always": "Toujours", "Frequently": "Fréquemment", "Sometimes": "Parfois", "0": "Jamais", "no": "Jamais"}
+LABEL_MAP = {
+    "Insufficient_Weight": "Insuffisance_Ponderale",
+    "Normal_Weight": "Poids_Normal",
+    "0rmal_Weight": "Poids_Normal",
+    "Overweight_Level_I": "Surpoids_Niveau_I",
+    "Overweight_Level_II": "Surpoids_Niveau_II",
+    "Obesity_Type_I": "Obesite_Type_I",
+    "Obesity_Type_II": "Obesite_Type_II",
+    "Obesity_Type_III": "Obesite_Type_III"
+}
+TRANSPORT_MAP = {
+    "Public_Transportation": "Transports_Publics",
+    "Automobile": "Voiture",
+    "Motorbike": "Moto",
+    "Bike": "Vélo",
+    "Walking": "Marche",
+    "Other": "Autre"
+}
+
+# ---------------------------------------------------------------------------
+# Étapes : fonctions de niveau module (exécutables dans un sous-processus),
+# appelées avec les chemins absolus de leurs entrées / sorties et leurs paramètres.
+
+def _read_splits(inputs: Dict[str, str], names=("X_train", "y_train", "X_test", "y_test")):
+    import pandas as pd
+    return [pd.read_csv(inputs[n]).squeeze() if n.startswith("y") else pd.read_csv(inputs[n]) for n in names]
+
+def _preprocessor(X):
+    """ColumnTransformer du notebook : numériques standardisées, catégorielles en one-hot."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    return ColumnTransformer([
+        ("num", StandardScaler(), X.select_dtypes(include="number").columns.tolist()),
+        ("cat", OneHotEncoder(drop="first", handle_unknown="ignore"), X.select_dtypes(exclude="number").columns.tolist())
+    ])
+
+def clean_stage(inputs, outputs):
+    """Étape 1 : renommage, traductions, valeurs manquantes, doublons et arrondis."""
+    import pandas as pd
+    df = pd.read_csv(inputs["brut"]).rename(columns=RENAME_COLUMNS)
+    df["genre"] = df["genre"].map({"Male": "Homme", "Female": "Femme"})
+    df["grignotage"] = df["grignotage"].replace(FREQUENCY_MAP)
+    df["alcool"] = df["alcool"].replace(FREQUENCY_MAP)
+    df["obesite_label"] = df["obesite_label"].replace(LABEL_MAP)
+
+    numeric_cols = df.select_dtypes(include="number").columns
+    df[numeric_cols] = df[numeric_cols].apply(lambda c: c.fillna(c.median()))
+    categorical_cols = df.select_dtypes(exclude="number").columns
+    df[categorical_cols] = df[categorical_cols].fillna("Inconnu")
+    df = df.drop_duplicates().reset_index(drop=True)
+
+    df["transport"] = df["transport"].replace(TRANSPORT_MAP)
+    df["age"] = df["age"].round().astype(int)
+    others = [c for c in df.select_dtypes(include="number").columns if c != "age"]
+    df[others] = df[others].round(2)
+    df.to_csv(outputs["propre"], index=False)
+
+def split_stage(inputs, outputs, test_size, random_state):
+    """Étape 2 : séparation entraînement / test stratifiée."""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    df = pd.read_csv(inputs["propre"])
+    X_train, X_test, y_train, y_test = train_test_split(
+        df.drop(columns=["obesite_label"]), df["obesite_label"],
+        test_size=test_size, random_state=random_state, stratify=df["obesite_label"]
+    )
+    for name, frame in (("X_train", X_train), ("X_test", X_test), ("y_train", y_train), ("y_test", y_test)):
+        frame.to_csv(outputs[name], index=False)
+
+def baseline_stage(inputs, outputs, C, cv, random_state):
+    """Étape 3 : régression logistique multinomiale + SMOTE, C choisi par GridSearchCV."""
+    import joblib
+    from imblearn.over_sampling import SMOTE
+    from imblearn.pipeline import Pipeline as ImbPipeline
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold
+    from threadpoolctl import threadpool_limits
+    from parallelism import plan_parallelism
+    X_train, y_train = _read_splits(inputs, ("X_train", "y_train"))
+    budget = plan_parallelism("recherche", tasks=len(C) * cv)
+    pipe = ImbPipeline([
+        ("preprocess", _preprocessor(X_train)),
+        ("smote", SMOTE(random_state=random_state)),
+        # lbfgs est multinomial par défaut (multi_class est retiré des versions récentes)
+        ("model", LogisticRegression(solver="lbfgs", max_iter=1000, random_state=random_state))
+    ])
+    grid = GridSearchCV(pipe, {"model__C": C}, scoring="balanced_accuracy",
+                        cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state),
+                        n_jobs=budget["workers"])
+    with threadpool_limits(limits=budget["threads"], user_api="blas"):
+        grid.fit(X_train, y_train)
+    joblib.dump(grid.best_estimator_, outputs["modele"])
+
+def search_stage(inputs, outputs, n_iter, cv, n_estimators, random_state):
+    """Étape 5 : recherche aléatoire des hyper-paramètres du pipeline LightGBM."""
+    import warnings
+    import joblib
+    import lightgbm as lgb
+    import numpy as np
+    from imblearn.over_sampling import SMOTE
+    from imblearn.pipeline import Pipeline as ImbPipeline
+    from sklearn.metrics import balanced_accuracy_score, f1_score
+    from sklearn.model_selection import RandomizedSearchCV, StratifiedKFold
+    from parallelism import plan_parallelism
+    X_train, y_train, X_test, y_test = _read_splits(inputs)
+    budget = plan_parallelism("recherche", tasks=n_iter * cv)
+    pipe = ImbPipeline([
+        ("preprocess", _preprocessor(X_train)),
+        ("smote", SMOTE(random_state=random_state)),
+        ("model", lgb.LGBMClassifier(objective="multiclass", class_weight="balanced", n_estimators=n_estimators,
+                                     random_state=random_state, n_jobs=budget["threads"], verbose=-1))
+    ])
+    param_dist = {
+        "model__num_leaves": np.arange(20, 150, 10),
+        "model__max_depth": [-1] + list(range(3, 12)),
+        "model__learning_rate": np.linspace(0.01, 0.3, 30),
+        "model__min_child_samples": [10, 20, 30, 40, 50],
+        "model__subsample": np.linspace(0.6, 1.0, 5)
+    }
+    search = RandomizedSearchCV(pipe, param_dist, n_iter=n_iter, scoring="balanced_accuracy",
+                                cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state),
+                                random_state=random_state, n_jobs=budget["workers"])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        search.fit(X_train, y_train)
+    y_pred = search.predict(X_test)
+    joblib.dump(search.best_estimator_, outputs["pipeline"])
+    with open(outputs["rapport"], "w", encoding="utf-8") as f:
+        json.dump({
+            "best_params": {k: np.asarray(v).item() for k, v in search.best_params_.items()},
+            "balanced_accuracy_cv": float(search.best_score_),
+            "balanced_accuracy_test": float(balanced_accuracy_score(y_test, y_pred)),
+            "macro_f1_test": float(f1_score(y_test, y_pred, average="macro"))
+        }, f, indent=2)
+
+def calibration_stage(inputs, outputs, method, cv):
+    """Étape 6 : calibration des probabilités du meilleur pipeline LightGBM."""
+    import joblib
+    from sklearn.calibration import CalibratedClassifierCV
+    from parallelism import plan_parallelism, set_model_threads
+    X_train, y_train = _read_splits(inputs, ("X_train", "y_train"))
+    budget = plan_parallelism("calibration", tasks=cv)
+    calibrated = CalibratedClassifierCV(set_model_threads(joblib.load(inputs["pipeline"]), budget["threads"]),
+                                        method=method, cv=cv, n_jobs=budget["workers"])
+    calibrated.fit(X_train, y_train)
+    joblib.dump(calibrated, outputs["modele"])
+
+def feature_store_dir(inputs) -> str:
+    """Magasin de matrices transformées (voir feature_store.py), à côté du modèle consommé.
+
+    Ses matrices sont indexées par l'empreinte du préprocesseur : ce n'est pas une sortie
+    déclarée des étapes, mais un cache partagé entre elles.
+    """
+    return os.path.join(os.path.dirname(inputs["modele"]), "features")
+
+def shap_png_stage(inputs, outputs, max_display):
+    """Résumés SHAP statiques (sans puis avec noms de variables) du premier pli calibré."""
+    import joblib
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import shap
+    import numpy as np
+    from feature_store import open_features
+    from utils import get_pipeline
+    pipeline = get_pipeline(joblib.load(inputs["modele"]))
+    features = open_features(pipeline.named_steps["preprocess"], inputs["X_test"], feature_store_dir(inputs))
+    X_test_trans = np.asarray(features.values, dtype=np.float64)
+    shap_values = shap.TreeExplainer(pipeline.named_steps["model"]).shap_values(X_test_trans)
+    feature_names = features.feature_names
+    for key, names in (("resume", None), ("resume_nomme", feature_names)):
+        plt.figure(figsize=(12, 7))
+        shap.summary_plot(shap_values, X_test_trans, feature_names=names, show=False, max_display=max_display)
+        plt.tight_layout()
+        plt.savefig(outputs[key])
+        plt.close("all")
+
+def shap_values_stage(inputs, outputs, chunk_size):
+    """Matrice SHAP globale lue par la page Analyse (voir shap_store.py)."""
+    import joblib
+    import pandas as pd
+    from feature_store import open_features
+    from shap_store import compute_shap_store
+    from utils import get_preprocessor
+    model = joblib.load(inputs["modele"])
+    features = open_features(get_preprocessor(model), inputs["X_test"], feature_store_dir(inputs))
+    compute_shap_store(model, pd.read_csv(inputs["X_test"]), pd.read_csv(inputs["y_test"]).squeeze(),
+                       outputs["matrice"], chunk_size=chunk_size, features=features)
+
+def neighbors_stage(inputs, outputs):
+    """Index des profils similaires (voir neighbors_index.py)."""
+    import joblib
+    import pandas as pd
+    from feature_store import open_features
+    from neighbors_index import build_dataset_index
+    from utils import get_preprocessor
+    model = joblib.load(inputs["modele"])
+    features = open_features(get_preprocessor(model), inputs["propre"], feature_store_dir(inputs))
+    build_dataset_index(model, pd.read_csv(inputs["propre"]), features).save(outputs["index"])
+
+def cascade_stage(inputs, outputs, target_agreement):
+    """Seuil de la cascade logistique → LightGBM (voir cascade.py)."""
+    import joblib
+    import pandas as pd
+    from cascade import calibrate_cascade
+    report = calibrate_cascade(joblib.load(inputs["base"]), joblib.load(inputs["modele"]),
+                               pd.read_csv(inputs["X_test"]), pd.read_csv(inputs["y_test"]).squeeze(),
+                               target_agreement)
+    with open(outputs["seuil"], "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+def evaluation_stage(inputs, outputs):
+    """Rapport d'évaluation du modèle sur le jeu de test (voir evaluation.py)."""
+    import joblib
+    from evaluation import build_report, write_report
+    report = build_report(joblib.load(inputs["modele"]), [inputs["modele"]], inputs["X_test"], inputs["y_test"])
+    write_report(report, outputs["rapport"])
+
+# ---------------------------------------------------------------------------
+# Graphe déclaratif : chemins relatifs à la racine du dépôt. Les dépendances entre
+# étapes se déduisent des chemins (une entrée produite par une autre étape).
+
+SPLITS = {
+    "X_train": "data/X_train.csv", "X_test": "data/X_test.csv",
+    "y_train": "data/y_train.csv", "y_test": "data/y_test.csv"
+}
+
+STAGES: Dict[str, Dict[str, Any]] = {
+    "nettoyage": {
+        "run": clean_stage,
+        "inputs": {"brut": "data/BDDobesity_level_V2.csv"},
+        "outputs": {"propre": "data/obesite_clean_fr.csv"},
+        "params": {}
+    },
+    "split": {
+        "run": split_stage,
+        "inputs": {"propre": "data/obesite_clean_fr.csv"},
+        "outputs": SPLITS,
+        "params": {"test_size": 0.30, "random_state": RANDOM_STATE}
+    },
+    "baseline": {
+        "run": baseline_stage,
+        "inputs": {"X_train": SPLITS["X_train"], "y_train": SPLITS["y_train"]},
+        "outputs": {"modele": "models/modele_base.pkl"},
+        "params": {"C": [0.01, 0.1, 1, 5, 10], "cv": 5, "random_state": RANDOM_STATE}
+    },
+    "recherche_lgbm": {
+        "run": search_stage,
+        "inputs": SPLITS,
+        "outputs": {"pipeline": "build/artifacts/lgbm_search.pkl", "rapport": "build/artifacts/lgbm_search.json"},
+        "params": {"n_iter": 60, "cv": 5, "n_estimators": 400, "random_state": RANDOM_STATE}
+    },
+    "calibration": {
+        "run": calibration_stage,
+        "inputs": {"pipeline": "build/artifacts/lgbm_search.pkl",
+                   "X_train": SPLITS["X_train"], "y_train": SPLITS["y_train"]},
+        "outputs": {"modele": "models/modele_lgbm.pkl"},
+        "params": {"method": "sigmoid", "cv": 3}
+    },
+    "shap_png": {
+        "run": shap_png_stage,
+        "inputs": {"modele": "models/modele_lgbm.pkl", "X_test": SPLITS["X_test"]},
+        "outputs": {"resume": "assets/shap_summary.png", "resume_nomme": "assets/shap_summary_named.png"},
+        "params": {"max_display": 25}
+    },
+    "shap_values": {
+        "run": shap_values_stage,
+        "inputs": {"modele": "models/modele_lgbm.pkl", "X_test": SPLITS["X_test"], "y_test": SPLITS["y_test"]},
+        "outputs": {"matrice": "assets/shap_values"},
+        "params": {"chunk_size": 500}
+    },
+    "index_voisins": {
+        "run": neighbors_stage,
+        "inputs": {"modele": "models/modele_lgbm.pkl", "propre": "data/obesite_clean_fr.csv"},
+        "outputs": {"index": "models/neighbors_index"},
+        "params": {}
+    },
+    "cascade": {
+        "run": cascade_stage,
+        "inputs": {"base": "models/modele_base.pkl", "modele": "models/modele_lgbm.pkl",
+                   "X_test": SPLITS["X_test"], "y_test": SPLITS["y_test"]},
+        "outputs": {"seuil": "models/cascade.json"},
+        "params": {"target_agreement": 0.99}
+    },
+    "evaluation": {
+        "run": evaluation_stage,
+        "inputs": {"modele": "models/modele_lgbm.pkl", "X_test": SPLITS["X_test"], "y_test": SPLITS["y_test"]},
+        "outputs": {"rapport": "models/evaluation.json"},
+        "params": {}
+    }
+}
+
+# ---------------------------------------------------------------------------
+# Empreintes, cache et ordonnancement
+
+def _local_imports(source: str, src_dir: str) -> Set[str]:
+    """Modules de src/ importés par un code source (import x, from x / from src.x import ...)."""
+    names = set()
+    for node in ast.walk(ast.parse(textwrap.dedent(source))):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+    modules = {n[len("src."):] if n.startswith("src.") else n for n in names}
+    return {m for m in modules if os.path.isfile(os.path.join(src_dir, m + ".py"))}
+
+def stage_code(run: Callable, src_dir: str = SRC_DIR) -> Dict[str, str]:
+    """Code dont dépend une étape, par nom : sa fonction, les fonctions et constantes de
+    ce module qu'elle utilise, et le source des modules de src/ qu'elle importe (transitivement).
+    """
+    code: Dict[str, str] = {}
+    functions, modules = [run], set()
+    while functions:
+        function = functions.pop()
+        if function.__name__ in code:
+            continue
+        source = inspect.getsource(function)
+        code[function.__name__] = source
+        modules |= _local_imports(source, src_dir)
+        # Noms globaux du corps de la fonction et de ses lambdas / fonctions imbriquées
+        code_objects, names = [function.__code__], set()
+        while code_objects:
+            current = code_objects.pop()
+            names.update(current.co_names)
+            code_objects.extend(c for c in current.co_consts if inspect.iscode(c))
+        for name in sorted(names):
+            value = function.__globals__.get(name)
+            if inspect.isfunction(value) and value.__module__ == function.__module__:
+                functions.append(value)
+            elif isinstance(value, (dict, list, tuple, str, int, float)):
+                code[name] = repr(value)
+
+    pending = sorted(modules)
+    while pending:
+        module = pending.pop()
+        with open(os.path.join(src_dir, module + ".py"), encoding="utf-8") as f:
+            source = f.read()
+        code[module + ".py"] = source
+        for imported in _local_imports(source, src_dir) - modules:
+            modules.add(imported)
+            pending.append(imported)
+    return code
+
+def stage_key(name: str, stage: Dict[str, Any], root: str) -> str:
+    """Empreinte d'une étape : contenu de ses entrées, paramètres et code (voir stage_code)."""
+    digest = hashlib.sha256(name.encode())
+    for key, path in sorted(stage["inputs"].items()):
+        digest.update(f"{key}={hash_path(os.path.join(root, path))}".encode())
+    digest.update(json.dumps(stage["params"], sort_keys=True).encode())
+    for code_name, source in sorted(stage_code(stage["run"]).items()):
+        digest.update(f"{code_name}={source}".encode())
+    return digest.hexdigest()
+
+def stage_dependencies(stages: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Étapes amont de chaque étape, déduites des chemins d'entrée et de sortie."""
+    producers = {path: name for name, stage in stages.items() for path in stage["outputs"].values()}
+    return {
+        name: sorted({producers[p] for p in stage["inputs"].values() if p in producers})
+        for name, stage in stages.items()
+    }
+
+def stage_order(dependencies: Dict[str, List[str]]) -> List[str]:
+    """Ordre topologique des étapes ; lève ValueError sur un cycle (étape qui lit sa propre sortie comprise)."""
+    order: List[str] = []
+    state: Dict[str, str] = {}
+    for start in dependencies:
+        if start in state:
+            continue
+        stack = [(start, iter(dependencies[start]))]
+        state[start] = "en cours"
+        while stack:
+            name, pending = stack[-1]
+            dep = next(pending, None)
+            if dep is None:
+                stack.pop()
+                state[name] = "fait"
+                order.append(name)
+            elif state.get(dep) == "en cours":
+                path = [n for n, _ in stack]
+                cycle = path[path.index(dep):] + [dep]
+                raise ValueError(f"Cycle dans le graphe de construction (→ : dépend de) : {' → '.join(cycle)}")
+            elif dep not in state:
+                state[dep] = "en cours"
+                stack.append((dep, iter(dependencies[dep])))
+    return order
+
+def _copy(src: str, dst: str):
+    if os.path.isdir(dst):
+        shutil.rmtree(dst)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    if os.path.isdir(src):
+        shutil.copytree(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+def _execute(run: Callable, inputs: Dict[str, str], outputs: Dict[str, str], params: Dict[str, Any],
+             src_dir: str, cores: int) -> float:
+    """Exécute une étape dans un sous-processus et retourne sa durée.
+
+    Chemins et paramètres sont résolus par le processus parent : un worker lancé en
+    spawn ne voit pas les surcharges --set appliquées à STAGES.
+    """
+    import sys
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    # Part des cœurs de l'étape : ses propres budgets (plan_parallelism) s'y limitent
+    os.environ[CORES_ENV] = str(cores)
+    for path in outputs.values():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    start = time.perf_counter()
+    run(inputs, outputs, **params)
+    return time.perf_counter() - start
+
+class BuildGraph:
+    """Reconstruit uniquement les étapes périmées, en parallèle quand elles sont indépendantes.
+
+    Une étape est à jour si son empreinte (entrées, paramètres, code) est celle de sa
+    dernière exécution et si ses sorties n'ont pas été modifiées depuis. Les sorties de
+    chaque exécution sont copiées dans build/cache/<étape>/<empreinte>/ : revenir à un
+    état déjà construit les restaure sans recalcul.
+    """
+
+    def __init__(self, root: str, stages: Dict[str, Dict[str, Any]] = None,
+                 build_dir: str = "build", log: Callable[[str], None] = print):
+        self.root = root
+        self.stages = stages or STAGES
+        self.build_dir = os.path.join(root, build_dir)
+        self.state_path = os.path.join(self.build_dir, "state.json")
+        self.dependencies = stage_dependencies(self.stages)
+        self.order = stage_order(self.dependencies)
+        self.log = log
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+
+    def _save_state(self):
+        os.makedirs(self.build_dir, exist_ok=True)
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+
+    def _output_hashes(self, name: str) -> Dict[str, Optional[str]]:
+        return {path: hash_path(os.path.join(self.root, path)) for path in self.stages[name]["outputs"].values()}
+
+    def _cache_dir(self, name: str, key: str) -> str:
+        return os.path.join(self.build_dir, "cache", name, key)
+
+    def is_fresh(self, name: str, key: str) -> bool:
+        recorded = self.state.get(name)
+        return (recorded is not None and recorded["key"] == key
+                and recorded["outputs"] == self._output_hashes(name)
+                and None not in recorded["outputs"].values())
+
+    def _restore(self, name: str, key: str) -> bool:
+        """Restaure les sorties d'une exécution précédente depuis le cache disque."""
+        cache_dir = self._cache_dir(name, key)
+        outputs = self.stages[name]["outputs"]
+        if not all(os.path.exists(os.path.join(cache_dir, k)) for k in outputs):
+            return False
+        for k, path in outputs.items():
+            _copy(os.path.join(cache_dir, k), os.path.join(self.root, path))
+        return True
+
+    def _record(self, name: str, key: str):
+        cache_dir = self._cache_dir(name, key)
+        for k, path in self.stages[name]["outputs"].items():
+            _copy(os.path.join(self.root, path), os.path.join(cache_dir, k))
+        self.state[name] = {"key": key, "outputs": self._output_hashes(name)}
+        self._save_state()
+
+    def _selection(self, targets: Optional[List[str]]) -> List[str]:
+        """Étapes demandées et toutes leurs étapes amont."""
+        if not targets:
+            return list(self.stages)
+        selected, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise KeyError(f"Étape inconnue : {name}")
+            if name not in selected:
+                selected.add(name)
+                stack.extend(self.dependencies[name])
+        return [n for n in self.order if n in selected]
+
+    def run(self, targets: Optional[List[str]] = None, jobs: int = None, force: List[str] = ()) -> Dict[str, str]:
+        """Construit les cibles ; retourne le sort de chaque étape (à jour, restaurée, exécutée)."""
+        selected = self._selection(targets)
+        outcome: Dict[str, str] = {}
+        running = {}
+        jobs = jobs or 1
+        # Les étapes simultanées se partagent les cœurs au lieu de prendre chacune toute la machine
+        cores = max(1, available_cores() // jobs)
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            while len(outcome) < len(selected):
+                # Les empreintes d'une étape ne se calculent qu'une fois ses entrées produites
+                for name in selected:
+                    if name in outcome or name in running.values():
+                        continue
+                    if not all(dep in outcome for dep in self.dependencies[name] if dep in selected):
+                        continue
+                    key = stage_key(name, self.stages[name], self.root)
+                    if name not in force and self.is_fresh(name, key):
+                        outcome[name] = "à jour"
+                    elif name not in force and self._restore(name, key):
+                        self._record(name, key)
+                        outcome[name] = "restaurée du cache"
+                    else:
+                        stage = self.stages[name]
+                        self.log(f"▶ {name}")
+                        running[pool.submit(
+                            _execute, stage["run"],
+                            {k: os.path.join(self.root, p) for k, p in stage["inputs"].items()},
+                            {k: os.path.join(self.root, p) for k, p in stage["outputs"].items()},
+                            dict(stage["params"]), SRC_DIR, cores
+                        )] = name
+                        continue
+                    self.log(f"✓ {name} : {outcome[name]}")
+
+                if not running:
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    elapsed = future.result()
+                    self._record(name, stage_key(name, self.stages[name], self.root))
+                    outcome[name] = f"exécutée en {elapsed:.1f} s"
+                    self.log(f"✓ {name} : {outcome[name]}")
+        return outcome
+
+if __name__ == "__main__":
+    import argparse
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(
+        description="Reconstruit les données, modèles et assets périmés.",
+        epilog="Attention : les sorties sont écrites à leur place sous --root. Dans le dépôt, cela remplace "
+               "des fichiers versionnés (data/*.csv, models/modele_base.pkl, assets/shap_summary*.png) ; "
+               "pour les comparer ou les laisser intacts, lancer le build sur une copie avec --root."
+    )
+    parser.add_argument("stages", nargs="*", help=f"Étapes cibles (défaut : toutes) parmi {', '.join(STAGES)}")
+    parser.add_argument("--root", default=root)
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Étapes exécutées en parallèle (les cœurs sont répartis entre elles)")
+    parser.add_argument("--force", nargs="*", default=[], help="Étapes à réexécuter même si elles sont à jour")
+    parser.add_argument("--set", nargs="*", default=[], metavar="ETAPE.PARAM=VALEUR",
+                        help="Surcharge un paramètre, ex. recherche_lgbm.n_iter=10")
+    args = parser.parse_args()
+
+    for assignment in args.set:
+        target, value = assignment.split("=", 1)
+        stage_name, param = target.split(".", 1)
+        STAGES[stage_name]["params"][param] = json.loads(value)
+
+    start = time.perf_counter()
+    BuildGraph(args.root).run(args.stages, jobs=args.jobs, force=args.force)
+    print(f"✅ Build terminé en {time.perf_counter() - start:.1f} s")
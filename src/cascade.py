@@ -0,0 +1,178 @@
+import json
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    from utils import load_model
+    from parallelism import plan_parallelism, set_model_threads, limit_native_threads
+except ImportError:
+    from src.utils import load_model
+    from src.parallelism import plan_parallelism, set_model_threads, limit_native_threads
+
+# Accord visé par défaut entre la cascade et le LightGBM seul, sur X_test
+DEFAULT_TARGET_AGREEMENT = 0.99
+
+class CascadeClassifier:
+    """Cascade à deux étages : la régression logistique répond seule quand elle est sûre d'elle.
+
+    Les lignes dont la probabilité maximale de la baseline est inférieure à threshold sont
+    réévaluées par le modèle expert (LightGBM calibré). Expose classes_, predict et
+    predict_proba comme un classifieur scikit-learn ; get_pipeline renvoie le pipeline
+    de l'expert, utilisé pour le préprocesseur et les explications SHAP.
+    """
+
+    def __init__(self, base, expert, threshold: float):
+        self.base = base
+        self.expert = expert
+        self.threshold = threshold
+        self.classes_ = np.asarray(expert.classes_)
+        # Colonnes de la baseline réordonnées dans l'ordre des classes de l'expert
+        base_classes = list(base.classes_)
+        if sorted(base_classes) != sorted(self.classes_.tolist()):
+            raise ValueError("La baseline et le modèle expert n'ont pas les mêmes classes")
+        self._base_order = [base_classes.index(c) for c in self.classes_]
+
+    def predict_proba_routed(self, X: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Retourne les probabilités et le masque des lignes escaladées vers l'expert."""
+        probabilities = self.base.predict_proba(X)[:, self._base_order]
+        escalated = probabilities.max(axis=1) < self.threshold
+        if escalated.any():
+            probabilities[escalated] = self.expert.predict_proba(X[escalated])
+        return probabilities, escalated
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        return self.predict_proba_routed(X)[0]
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+def load_cascade(expert, base_path: str, config_path: str) -> Optional[CascadeClassifier]:
+    """Construit la cascade à partir du seuil calibré, ou None si la calibration n'a pas tourné."""
+    try:
+        with open(config_path, encoding="utf-8") as f:
+            config = json.load(f)
+        return CascadeClassifier(joblib.load(base_path), expert, config["threshold"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+def agreement_curve(base_proba: np.ndarray, expert_pred: np.ndarray) -> pd.DataFrame:
+    """Taux d'escalade et accord avec l'expert pour chaque seuil candidat.
+
+    Les seuils candidats sont les confiances observées de la baseline : une ligne est
+    escaladée si sa confiance est strictement inférieure au seuil, et une ligne escaladée
+    reçoit la réponse de l'expert (accord garanti).
+    """
+    confidence = base_proba.max(axis=1)
+    agrees = np.argmax(base_proba, axis=1) == expert_pred
+    order = np.argsort(confidence)
+    sorted_conf = confidence[order]
+    # Seuil i : les i lignes les moins confiantes sont escaladées
+    disagreements_kept = np.concatenate([[0], np.cumsum(~agrees[order][::-1])])[::-1]
+    thresholds = np.append(sorted_conf, np.inf)
+    n = len(confidence)
+    escalated = np.searchsorted(sorted_conf, thresholds, side="left")
+    return pd.DataFrame({
+        "threshold": thresholds,
+        "escalation_rate": escalated / n,
+        "agreement": 1 - disagreements_kept[escalated] / n
+    }).drop_duplicates("threshold")
+
+def pick_threshold(curve: pd.DataFrame, target_agreement: float) -> Dict[str, float]:
+    """Plus petit seuil (donc le moins d'escalades) qui atteint l'accord visé."""
+    row = curve[curve["agreement"] >= target_agreement].iloc[0]
+    return {k: float(row[k]) for k in ("threshold", "escalation_rate", "agreement")}
+
+def _median_row_latency_ms(predict, X: pd.DataFrame) -> float:
+    """Latence médiane d'une prédiction ligne à ligne, comme dans l'application."""
+    latencies = []
+    for i in range(len(X)):
+        start = time.perf_counter()
+        predict(X.iloc[[i]])
+        latencies.append((time.perf_counter() - start) * 1e3)
+    return float(np.median(latencies))
+
+def calibrate_cascade(base, expert, X: pd.DataFrame, y: Optional[pd.Series] = None,
+                      target_agreement: float = DEFAULT_TARGET_AGREEMENT,
+                      latency_rows: int = 200) -> Dict[str, Any]:
+    """Choisit le seuil de la cascade sur X et mesure escalade, accord, exactitude et latence."""
+    base_proba = base.predict_proba(X)[:, [list(base.classes_).index(c) for c in expert.classes_]]
+    expert_proba = expert.predict_proba(X)
+    report = pick_threshold(agreement_curve(base_proba, np.argmax(expert_proba, axis=1)), target_agreement)
+    report["target_agreement"] = target_agreement
+    if not np.isfinite(report["threshold"]):
+        report["threshold"] = 1.0
+
+    cascade = CascadeClassifier(base, expert, report["threshold"])
+    if y is not None:
+        y = np.asarray(y)
+        report["accuracy_expert"] = float((expert.classes_[np.argmax(expert_proba, axis=1)] == y).mean())
+        report["accuracy_cascade"] = float((cascade.predict(X) == y).mean())
+
+    sample = X.sample(n=min(latency_rows, len(X)), random_state=0)
+    report["latency_expert_ms"] = _median_row_latency_ms(expert.predict_proba, sample)
+    report["latency_cascade_ms"] = _median_row_latency_ms(cascade.predict_proba, sample)
+    # Moyenne attendue ligne à ligne : baseline toujours, expert pour les lignes escaladées
+    start = time.perf_counter()
+    routed = [cascade.predict_proba_routed(sample.iloc[[i]])[1][0] for i in range(len(sample))]
+    report["mean_latency_cascade_ms"] = (time.perf_counter() - start) * 1e3 / len(sample)
+    report["sample_escalation_rate"] = float(np.mean(routed))
+    return report
+
+@st.cache_resource
+def load_inference_model(model_path: str, mode: str = "lgbm"):
+    """Modèle utilisé par l'application : LightGBM seul, ou cascade si mode == "cascade".
+
+    Le parallélisme se fait entre sessions : chaque prédiction reçoit le budget de
+    threads 'inference' au lieu du n_jobs fixé à l'entraînement.
+    """
+    threads = plan_parallelism("inference")["threads"]
+    limit_native_threads(threads)
+    expert = load_model(model_path)
+    if expert is None:
+        return None
+    set_model_threads(expert, threads)
+    if mode != "cascade":
+        return expert
+    models_dir = os.path.dirname(model_path)
+    cascade = load_cascade(expert, os.path.join(models_dir, "modele_base.pkl"),
+                           os.path.join(models_dir, "cascade.json"))
+    if cascade is None:
+        st.warning("Seuil de cascade non calibré (python src/cascade.py) : LightGBM seul est utilisé.")
+        return expert
+    return set_model_threads(cascade, threads)
+
+if __name__ == "__main__":
+    import argparse
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Calibre le seuil de la cascade logistique → LightGBM sur X_test.")
+    parser.add_argument("--base", default=os.path.join(root, "models", "modele_base.pkl"))
+    parser.add_argument("--expert", default=os.path.join(root, "models", "modele_lgbm.pkl"))
+    parser.add_argument("--X", default=os.path.join(root, "data", "X_test.csv"))
+    parser.add_argument("--y", default=os.path.join(root, "data", "y_test.csv"))
+    parser.add_argument("--target-agreement", type=float, default=DEFAULT_TARGET_AGREEMENT)
+    parser.add_argument("--latency-rows", type=int, default=200)
+    parser.add_argument("--out", default=os.path.join(root, "models", "cascade.json"))
+    args = parser.parse_args()
+
+    report = calibrate_cascade(
+        joblib.load(args.base), joblib.load(args.expert), pd.read_csv(args.X),
+        pd.read_csv(args.y).squeeze(), args.target_agreement, args.latency_rows
+    )
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    saved = 1 - report["mean_latency_cascade_ms"] / report["latency_expert_ms"]
+    print(f"✅ Seuil {report['threshold']:.3f} enregistré dans {args.out}")
+    print(f"   accord avec LightGBM : {report['agreement']:.2%} (visé {args.target_agreement:.2%})")
+    print(f"   taux d'escalade : {report['escalation_rate']:.1%}")
+    if "accuracy_cascade" in report:
+        print(f"   exactitude : cascade {report['accuracy_cascade']:.2%}, LightGBM {report['accuracy_expert']:.2%}")
+    print(f"   latence par profil : LightGBM {report['latency_expert_ms']:.1f} ms, "
+          f"cascade {report['mean_latency_cascade_ms']:.1f} ms en moyenne "
+          f"(médiane {report['latency_cascade_ms']:.1f} ms), soit {saved:.0%} économisés")
@@ -0,0 +1,219 @@
+import time
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    from utils import prepare_input_batch, get_obesity_labels, to_model_category
+except ImportError:
+    from src.utils import prepare_input_batch, get_obesity_labels, to_model_category
+
+# Budget de temps total de la recherche pour un profil (à poids constant puis avec perte de poids)
+TIME_BUDGET_MS = 200
+
+# Classe cible la moins sévère : passer en insuffisance pondérale n'est pas une amélioration
+MIN_TARGET_SEVERITY = list(get_obesity_labels()).index("Poids_Normal")
+
+def has_lower_target(current_class: str) -> bool:
+    """Vrai si une classe cible existe entre « Poids normal » et current_class (exclue)."""
+    severity_order = list(get_obesity_labels())
+    return current_class in severity_order and severity_order.index(current_class) > MIN_TARGET_SEVERITY
+
+# Leviers modifiables, bornés par les plages de create_input_form.
+# "steps" : écarts proposés dans le sens favorable ; "cost" : effort par unité de changement.
+ACTIONABLE_FEATURES = {
+    "frequence_activite_physique": {
+        "label": "Activité physique", "unit": "jours/semaine", "kind": "numeric",
+        "direction": 1, "bounds": (0, 7), "steps": (1, 2, 3), "cost": 1.0
+    },
+    "temps_technologie": {
+        "label": "Temps d'écran", "unit": "h/jour", "kind": "numeric",
+        "direction": -1, "bounds": (0, 12), "steps": (1, 2, 4), "cost": 0.4
+    },
+    "consommation_legumes": {
+        "label": "Légumes", "unit": "portions/jour", "kind": "numeric",
+        "direction": 1, "bounds": (0, 5), "steps": (1, 2), "cost": 0.5
+    },
+    "consommation_eau": {
+        "label": "Eau", "unit": "L/jour", "kind": "numeric",
+        "direction": 1, "bounds": (0, 5), "steps": (1, 2), "cost": 0.5
+    },
+    "grignotage": {
+        "label": "Grignotage", "unit": "", "kind": "ordinal",
+        "order": ["Toujours", "Souvent", "Parfois", "Jamais"], "cost": 1.0
+    },
+    "alcool": {
+        "label": "Alcool", "unit": "", "kind": "ordinal",
+        "order": ["Toujours", "Souvent", "Parfois", "Jamais"], "cost": 0.5
+    },
+    "transport": {
+        "label": "Transport", "unit": "", "kind": "choice",
+        "targets": ["Marche", "Vélo"], "from": ["Automobile", "Transport_Public"], "cost": 1.5
+    },
+    "surveillance_calories": {
+        "label": "Suivi des calories", "unit": "", "kind": "choice",
+        "targets": ["Oui"], "from": ["Non"], "cost": 0.5
+    }
+}
+
+# Perte de poids proposée quand le poids n'est pas maintenu fixe (fraction du poids actuel)
+WEIGHT_FEATURE = {
+    "label": "Poids", "unit": "kg", "kind": "relative",
+    "direction": -1, "bounds": (30.0, 300.0), "steps": (0.03, 0.05, 0.10), "cost": 0.4
+}
+
+class CounterfactualEngine:
+    """Recherche en faisceau des plus petits changements de mode de vie qui font baisser la classe prédite."""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes = [str(c) for c in model.classes_]
+        severity_order = list(get_obesity_labels())
+        self.severity = np.array([severity_order.index(c) if c in severity_order else -1
+                                  for c in self.classes])
+        # Durée (ms) et taille du dernier lot évalué, pour estimer le coût du suivant
+        self._last_level: Optional[Tuple[float, int]] = None
+
+    def _single_edits(self, user_inputs: Dict[str, Any], vary_weight: bool) -> List[Tuple[str, Any, float]]:
+        """Liste des modifications élémentaires (variable, nouvelle valeur, coût) réalisables."""
+        features = dict(ACTIONABLE_FEATURES)
+        if vary_weight:
+            features["poids_kg"] = WEIGHT_FEATURE
+
+        edits = []
+        for name, spec in features.items():
+            current = user_inputs[name]
+            if spec["kind"] == "numeric":
+                low, high = spec["bounds"]
+                for step in spec["steps"]:
+                    value = min(high, max(low, current + spec["direction"] * step))
+                    if value != current:
+                        edits.append((name, value, spec["cost"] * abs(value - current)))
+            elif spec["kind"] == "relative":
+                low, high = spec["bounds"]
+                for step in spec["steps"]:
+                    value = round(min(high, max(low, current * (1 + spec["direction"] * step))), 1)
+                    if value != current:
+                        edits.append((name, value, spec["cost"] * abs(value - current) / current * 100))
+            elif spec["kind"] == "ordinal":
+                order = spec["order"]
+                if current in order:
+                    # Deux modalités du formulaire peuvent être la même pour le modèle
+                    # (alcool : Toujours et Souvent) : seuls les niveaux qu'il distingue sont proposés
+                    reached = {to_model_category(name, current)}
+                    start = order.index(current)
+                    for level, value in enumerate(order[start + 1:], 1):
+                        model_value = to_model_category(name, value)
+                        if model_value not in reached:
+                            reached.add(model_value)
+                            edits.append((name, value, spec["cost"] * level))
+            elif spec["kind"] == "choice" and current in spec["from"]:
+                edits.extend((name, value, spec["cost"]) for value in spec["targets"])
+
+        # Dédoublonnage (les bornes peuvent ramener deux pas à la même valeur)
+        return list({(n, v): (n, v, c) for n, v, c in edits}.values())
+
+    def _score(self, user_inputs: Dict[str, Any], candidates: List[Dict[str, Any]],
+               current_severity: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Évalue tous les candidats en un seul appel predict_proba.
+
+        Retourne la sévérité prédite, sa probabilité et la probabilité cumulée des classes
+        cibles, de « Poids normal » à la classe actuelle exclue (critère d'élagage du faisceau).
+        """
+        batch = prepare_input_batch([dict(user_inputs, **changes) for changes in candidates])
+        probabilities = self.model.predict_proba(batch)
+        best = np.argmax(probabilities, axis=1)
+        lower = (self.severity < current_severity) & (self.severity >= MIN_TARGET_SEVERITY)
+        return self.severity[best], probabilities[np.arange(len(best)), best], probabilities[:, lower].sum(axis=1)
+
+    def suggest(self, user_inputs: Dict[str, Any], current_class: str, top_n: int = 3,
+                beam_width: int = 3, max_changes: int = 2, vary_weight: bool = False,
+                deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Retourne les top_n plus petits changements qui font passer le profil à une classe inférieure.
+
+        Seules les classes de « Poids normal » à la classe actuelle (exclue) sont des cibles :
+        un profil en surpoids ne « réussit » pas en passant en insuffisance pondérale.
+        Chaque niveau du faisceau ajoute une modification élémentaire aux meilleurs candidats
+        du niveau précédent ; tous les candidats d'un niveau sont évalués en un seul lot.
+        deadline (time.perf_counter) borne la recherche ; par défaut TIME_BUDGET_MS à partir de l'appel.
+        """
+        if deadline is None:
+            deadline = time.perf_counter() + TIME_BUDGET_MS / 1e3
+        if current_class not in self.classes:
+            return []
+        current_severity = int(self.severity[self.classes.index(current_class)])
+        # Pas de suggestion à partir de « Poids normal » : descendre n'y est pas souhaitable
+        if current_severity <= MIN_TARGET_SEVERITY:
+            return []
+
+        edits = self._single_edits(user_inputs, vary_weight)
+        beam = [({}, 0.0)]
+        seen = set()
+        solutions = []
+
+        for _ in range(max_changes):
+            candidates = []
+            for changes, cost in beam:
+                for name, value, edit_cost in edits:
+                    if name in changes:
+                        continue
+                    new_changes = dict(changes, **{name: value})
+                    key = frozenset(new_changes.items())
+                    if key not in seen:
+                        seen.add(key)
+                        candidates.append((new_changes, cost + edit_cost))
+            if not candidates:
+                break
+            # On s'arrête si le niveau suivant ne tient pas avant l'échéance. Le coût d'un appel
+            # groupé est estimé, d'après le dernier lot (de cet appel ou du précédent), à moitié
+            # fixe, à moitié proportionnel au nombre de lignes.
+            remaining_ms = (deadline - time.perf_counter()) * 1e3
+            if remaining_ms <= 0:
+                break
+            if self._last_level is not None:
+                level_ms, level_rows = self._last_level
+                if level_ms * (1 + len(candidates) / level_rows) / 2 > remaining_ms:
+                    break
+
+            level_start = time.perf_counter()
+            predicted, probability, lower_probability = self._score(
+                user_inputs, [c for c, _ in candidates], current_severity)
+            self._last_level = ((time.perf_counter() - level_start) * 1e3, len(candidates))
+
+            survivors = []
+            for (changes, cost), severity, prob, lower_prob in zip(candidates, predicted, probability,
+                                                                   lower_probability):
+                if MIN_TARGET_SEVERITY <= severity < current_severity:
+                    solutions.append((cost, -lower_prob, changes, int(severity), float(prob)))
+                else:
+                    survivors.append((changes, cost, lower_prob))
+
+            # Élagage : on garde les candidats les plus prometteurs par unité d'effort
+            survivors.sort(key=lambda s: -s[2] / (1.0 + s[1]))
+            beam = [(changes, cost) for changes, cost, _ in survivors[:beam_width]]
+            if len(solutions) >= top_n or not beam:
+                break
+
+        solutions.sort(key=lambda s: (s[0], s[1]))
+        # Une solution qui touche aux mêmes leviers qu'une solution moins coûteuse n'apporte rien
+        minimal = []
+        for solution in solutions:
+            features = set(solution[2])
+            if not any(set(kept[2]) <= features for kept in minimal):
+                minimal.append(solution)
+        severity_order = list(get_obesity_labels())
+        return [
+            {
+                "changes": [self._describe(name, user_inputs[name], value)
+                            for name, value in changes.items()],
+                "target_class": severity_order[severity],
+                # Probabilité de la classe estimée (et non des classes inférieures cumulées)
+                "probability": probability,
+                "cost": float(cost)
+            }
+            for cost, _, changes, severity, probability in minimal[:top_n]
+        ]
+
+    @staticmethod
+    def _describe(name: str, old: Any, new: Any) -> Dict[str, Any]:
+        spec = WEIGHT_FEATURE if name == "poids_kg" else ACTIONABLE_FEATURES[name]
+        return {"feature": name, "label": spec["label"], "unit": spec["unit"], "old": old, "new": new}
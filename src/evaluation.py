@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Dict, Any, List, Optional
+
+try:
+    from utils import hash_path
+except ImportError:
+    from src.utils import hash_path
+
+# Intervalles de probabilité des courbes de fiabilité
+RELIABILITY_BINS = 10
+
+def artifact_hash(paths: List[str]) -> str:
+    """Empreinte du contenu des fichiers qui définissent le modèle déployé."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(f"{os.path.basename(path)}={hash_path(path)}".encode())
+    return digest.hexdigest()
+
+def model_artifacts(model, model_path: str) -> List[str]:
+    """Fichiers du modèle chargé : le LightGBM, plus la baseline et le seuil en mode cascade."""
+    if hasattr(model, "expert"):
+        models_dir = os.path.dirname(model_path)
+        return [model_path, os.path.join(models_dir, "modele_base.pkl"), os.path.join(models_dir, "cascade.json")]
+    return [model_path]
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=float), where=denominator > 0)
+
+def compute_metrics(y_true: np.ndarray, probabilities: np.ndarray, classes: List[str],
+                    n_bins: int = RELIABILITY_BINS) -> Dict[str, Any]:
+    """Métriques de classification et de calibration, calculées sans boucle sur les lignes."""
+    n, k = probabilities.shape
+    lookup = {c: i for i, c in enumerate(classes)}
+    true_idx = np.array([lookup[str(c)] for c in y_true])
+    pred_idx = np.argmax(probabilities, axis=1)
+    onehot = np.zeros((n, k))
+    onehot[np.arange(n), true_idx] = 1.0
+
+    confusion = np.bincount(true_idx * k + pred_idx, minlength=k * k).reshape(k, k)
+    support = confusion.sum(axis=1)
+    predicted = confusion.sum(axis=0)
+    correct = np.diag(confusion).astype(float)
+    recall = _safe_divide(correct, support)
+    precision = _safe_divide(correct, predicted)
+    f1 = _safe_divide(2 * precision * recall, precision + recall)
+    squared_errors = (probabilities - onehot) ** 2
+
+    # Courbes de fiabilité un-contre-tous : intervalle de chaque (ligne, classe), un seul bincount
+    bins = np.minimum((probabilities * n_bins).astype(np.int64), n_bins - 1)
+    cells = (np.arange(k) * n_bins + bins).ravel()
+    counts = np.bincount(cells, minlength=k * n_bins).reshape(k, n_bins)
+    mean_predicted = _safe_divide(np.bincount(cells, probabilities.ravel(), k * n_bins).reshape(k, n_bins), counts)
+    observed = _safe_divide(np.bincount(cells, onehot.ravel(), k * n_bins).reshape(k, n_bins), counts)
+
+    # Erreur de calibration de la classe prédite (ECE), pondérée par l'effectif des intervalles
+    confidence = probabilities[np.arange(n), pred_idx]
+    top_bins = np.minimum((confidence * n_bins).astype(np.int64), n_bins - 1)
+    top_counts = np.bincount(top_bins, minlength=n_bins)
+    gap = np.abs(np.bincount(top_bins, confidence, n_bins) - np.bincount(top_bins, pred_idx == true_idx, n_bins))
+
+    return {
+        'classes': classes,
+        'n_samples': int(n),
+        'accuracy': float(correct.sum() / n),
+        'balanced_accuracy': float(recall[support > 0].mean()),
+        'brier': float(squared_errors.sum(axis=1).mean()),
+        'ece': float(gap.sum() / n),
+        'confusion': confusion.tolist(),
+        'per_class': pd.DataFrame({
+            'classe': classes, 'precision': precision, 'recall': recall, 'f1': f1,
+            'support': support, 'brier': squared_errors.mean(axis=0)
+        }).to_dict(orient="records"),
+        'reliability': {
+            c: {'mean_predicted': mean_predicted[i].tolist(), 'observed': observed[i].tolist(),
+                'count': counts[i].tolist()}
+            for i, c in enumerate(classes)
+        },
+        'confidence_counts': top_counts.tolist()
+    }
+
+def evaluate_model(model, X: pd.DataFrame, y: pd.Series) -> Dict[str, Any]:
+    """Évalue le modèle sur un jeu étiqueté en un seul appel predict_proba."""
+    start = time.perf_counter()
+    probabilities = model.predict_proba(X)
+    report = compute_metrics(np.asarray(y), probabilities, [str(c) for c in model.classes_])
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+def _read_report(report_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(report_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_report(report: Dict[str, Any], report_path: str):
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+def build_report(model, artifacts: List[str], X_path: str, y_path: str) -> Dict[str, Any]:
+    """Évalue le modèle sur le jeu de test et étiquette le rapport avec ses empreintes."""
+    report = evaluate_model(model, pd.read_csv(X_path), pd.read_csv(y_path).squeeze())
+    report['model_hash'] = artifact_hash(artifacts)
+    report['test_hash'] = artifact_hash([X_path, y_path])
+    report['evaluated_at'] = time.strftime("%Y-%m-%d %H:%M:%S")
+    return report
+
+@st.cache_resource(show_spinner="📏 Évaluation du modèle sur le jeu de test...")
+def load_evaluation_report(_model, model_path: str, X_path: str, y_path: str, report_path: str) -> Dict[str, Any]:
+    """Rapport d'évaluation du modèle chargé, relu tant que le modèle et le jeu de test n'ont pas changé."""
+    artifacts = model_artifacts(_model, model_path)
+    report = _read_report(report_path)
+    if (report is not None and report.get('model_hash') == artifact_hash(artifacts)
+            and report.get('test_hash') == artifact_hash([X_path, y_path])):
+        return report
+    report = build_report(_model, artifacts, X_path, y_path)
+    try:
+        write_report(report, report_path)
+    except OSError:
+        pass
+    return report
+
+if __name__ == "__main__":
+    import argparse
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Évalue le modèle sur X_test et enregistre le rapport.")
+    parser.add_argument("--model", default=os.path.join(root, "models", "modele_lgbm.pkl"))
+    parser.add_argument("--X", default=os.path.join(root, "data", "X_test.csv"))
+    parser.add_argument("--y", default=os.path.join(root, "data", "y_test.csv"))
+    parser.add_argument("--out", default=os.path.join(root, "models", "evaluation.json"))
+    args = parser.parse_args()
+
+    report = build_report(joblib.load(args.model), [args.model], args.X, args.y)
+    write_report(report, args.out)
+    print(f"✅ Rapport enregistré dans {args.out} ({report['n_samples']} profils, {report['seconds']:.1f} s)")
+    print(f"   balanced accuracy {report['balanced_accuracy']:.3f}, exactitude {report['accuracy']:.3f}, "
+          f"Brier {report['brier']:.3f}, ECE {report['ece']:.3f}")
@@ -0,0 +1,164 @@
+import json
+import os
+import shutil
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Dict, List
+
+try:
+    from utils import get_preprocessor, hash_path
+except ImportError:
+    from src.utils import get_preprocessor, hash_path
+
+# Répertoire par défaut du magasin, à côté des modèles
+FEATURE_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "features")
+# Lignes transformées par bloc à la matérialisation
+CHUNK_ROWS = 100_000
+
+def preprocessor_fingerprint(preprocessor) -> str:
+    """Empreinte du préprocesseur ajusté : une nouvelle version invalide ses matrices."""
+    return joblib.hash(preprocessor)
+
+def feature_names(preprocessor) -> List[str]:
+    """Noms des colonnes transformées, sans le préfixe du transformeur."""
+    return [n.split("__", 1)[-1] for n in preprocessor.get_feature_names_out()]
+
+class FeatureMatrix:
+    """Jeu de données transformé par le préprocesseur du modèle, en float32 ouvert en mmap.
+
+    values[i] est la ligne i du CSV source, row_ids[i] son identifiant. Les
+    consommateurs lisent directement les pages du fichier, sans copie ni re-transformation.
+    """
+
+    def __init__(self, values: np.ndarray, row_ids: np.ndarray, meta: Dict):
+        self.values = values
+        self.row_ids = row_ids
+        self.meta = meta
+        self.feature_names: List[str] = meta["feature_names"]
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    def columns(self, exclude=()) -> List[int]:
+        """Indices des colonnes dont le nom n'est pas dans exclude."""
+        return [i for i, n in enumerate(self.feature_names) if n not in exclude]
+
+    @classmethod
+    def load(cls, directory: str) -> "FeatureMatrix":
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        values = np.load(os.path.join(directory, "values.npy"), mmap_mode="r")
+        row_ids = np.load(os.path.join(directory, "row_ids.npy"), mmap_mode="r")
+        return cls(values, row_ids, meta)
+
+def materialize(preprocessor, source_path: str, directory: str, chunk_rows: int = CHUNK_ROWS) -> FeatureMatrix:
+    """Transforme source_path bloc par bloc et écrit la matrice float32 dans directory.
+
+    L'écriture se fait dans un répertoire temporaire renommé à la fin : deux processus
+    qui matérialisent la même matrice ne laissent jamais de fichier partiel.
+    """
+    columns = list(preprocessor.feature_names_in_)
+    names = feature_names(preprocessor)
+    n_rows = len(pd.read_csv(source_path, usecols=[columns[0]]))
+    tmp_dir = f"{directory}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    values = np.lib.format.open_memmap(os.path.join(tmp_dir, "values.npy"), mode="w+",
+                                       dtype=np.float32, shape=(n_rows, len(names)))
+    row_ids = np.lib.format.open_memmap(os.path.join(tmp_dir, "row_ids.npy"), mode="w+",
+                                        dtype=np.int64, shape=(n_rows,))
+    start = 0
+    for chunk in pd.read_csv(source_path, usecols=columns, chunksize=chunk_rows):
+        matrix = preprocessor.transform(chunk)
+        if hasattr(matrix, "toarray"):
+            matrix = matrix.toarray()
+        values[start:start + len(chunk)] = matrix
+        row_ids[start:start + len(chunk)] = (chunk["identifiant"].to_numpy() if "identifiant" in chunk
+                                             else np.arange(start, start + len(chunk)))
+        start += len(chunk)
+    values.flush()
+    row_ids.flush()
+    del values, row_ids
+
+    meta = {
+        "source": os.path.basename(source_path),
+        "source_hash": hash_path(source_path),
+        "preprocessor_hash": preprocessor_fingerprint(preprocessor),
+        "feature_names": names,
+        "shape": [n_rows, len(names)],
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    os.makedirs(os.path.dirname(directory), exist_ok=True)
+    try:
+        os.rename(tmp_dir, directory)
+    except OSError:
+        # Matrice publiée entre-temps par un autre processus (ou périmée) : on la remplace
+        shutil.rmtree(directory, ignore_errors=True)
+        try:
+            os.rename(tmp_dir, directory)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return FeatureMatrix.load(directory)
+
+def matrix_dir(preprocessor, source_path: str, store_dir: str) -> str:
+    """Emplacement de la matrice : un sous-répertoire par empreinte de préprocesseur."""
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(store_dir, preprocessor_fingerprint(preprocessor)[:16], name)
+
+def open_features(preprocessor, source_path: str, store_dir: str = FEATURE_STORE_DIR) -> FeatureMatrix:
+    """Ouvre la matrice transformée de source_path, matérialisée au besoin.
+
+    Elle est recalculée si le préprocesseur ou le contenu du CSV a changé.
+    """
+    directory = matrix_dir(preprocessor, source_path, store_dir)
+    try:
+        features = FeatureMatrix.load(directory)
+        if (features.meta.get("preprocessor_hash") == preprocessor_fingerprint(preprocessor)
+                and features.meta.get("source_hash") == hash_path(source_path)):
+            return features
+    except (OSError, ValueError, KeyError):
+        pass
+    return materialize(preprocessor, source_path, directory)
+
+def prune_store(preprocessor, store_dir: str = FEATURE_STORE_DIR) -> List[str]:
+    """Supprime les matrices des autres versions du préprocesseur ; retourne les répertoires effacés."""
+    if not os.path.isdir(store_dir):
+        return []
+    current = preprocessor_fingerprint(preprocessor)[:16]
+    removed = [os.path.join(store_dir, d) for d in sorted(os.listdir(store_dir)) if d != current]
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+    return removed
+
+@st.cache_resource(show_spinner=False)
+def load_feature_matrix(_model, source_path: str, store_dir: str = FEATURE_STORE_DIR) -> FeatureMatrix:
+    """Matrice transformée partagée par toutes les sessions (une seule projection mmap par processus)."""
+    return open_features(get_preprocessor(_model), source_path, store_dir)
+
+if __name__ == "__main__":
+    import argparse
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Matérialise les matrices transformées du modèle.")
+    parser.add_argument("sources", nargs="*", default=[
+        os.path.join(root, "data", f) for f in ("obesite_clean_fr.csv", "X_train.csv", "X_test.csv")])
+    parser.add_argument("--model", default=os.path.join(root, "models", "modele_lgbm.pkl"))
+    parser.add_argument("--out", default=FEATURE_STORE_DIR)
+    parser.add_argument("--keep-old", action="store_true", help="Conserver les matrices des préprocesseurs précédents")
+    args = parser.parse_args()
+
+    preprocessor = get_preprocessor(joblib.load(args.model))
+    for source in args.sources:
+        start = time.perf_counter()
+        features = open_features(preprocessor, source, args.out)
+        print(f"✅ {features.meta['source']} : matrice {features.values.shape} "
+              f"({features.values.nbytes / 1e6:.1f} Mo) prête en {time.perf_counter() - start:.1f} s")
+    if not args.keep_old:
+        for path in prune_store(preprocessor, args.out):
+            print(f"🗑️ {path} supprimé (préprocesseur précédent)")
@@ -0,0 +1,223 @@
+import json
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from utils import get_preprocessor, load_shared_data
+    from feature_store import FEATURE_STORE_DIR, FeatureMatrix, load_feature_matrix, open_features
+except ImportError:
+    from src.utils import get_preprocessor, load_shared_data
+    from src.feature_store import FEATURE_STORE_DIR, FeatureMatrix, load_feature_matrix, open_features
+
+# En dessous de ce nombre de lignes, un parcours exhaustif reste sous la milliseconde
+BRUTE_FORCE_MAX_ROWS = 50_000
+# Colonnes sans signification pour la similarité entre profils
+IGNORED_FEATURES = ("identifiant",)
+
+def transform_profiles(preprocessor, frame: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+    """Projette des profils dans l'espace standardisé / one-hot du modèle."""
+    matrix = preprocessor.transform(frame)
+    if hasattr(matrix, "toarray"):
+        matrix = matrix.toarray()
+    names = [n.split("__", 1)[-1] for n in preprocessor.get_feature_names_out()]
+    keep = [i for i, n in enumerate(names) if n not in IGNORED_FEATURES]
+    return np.ascontiguousarray(matrix[:, keep], dtype=np.float32), [names[i] for i in keep]
+
+class NeighborsIndex:
+    """Index des plus proches voisins par listes inversées (IVF) sur des vecteurs float32.
+
+    Les vecteurs sont regroupés par centroïde k-means et stockés de manière contiguë ;
+    une requête ne parcourt que les n_probe listes les plus proches. Pour les petits
+    jeux de données, une seule liste est utilisée et la recherche est exacte.
+    """
+
+    FILES = ("centroids", "offsets", "vectors", "norms", "labels", "row_ids")
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, vectors: np.ndarray,
+                 norms: np.ndarray, labels: np.ndarray, row_ids: np.ndarray, meta: Dict):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.vectors = vectors
+        self.norms = norms
+        self.labels = labels
+        self.row_ids = row_ids
+        self.meta = meta
+        self.classes = meta["classes"]
+        self.n_probe = meta.get("n_probe", 1)
+        self._centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, labels: np.ndarray, row_ids: np.ndarray, classes: List[str],
+              feature_names: List[str], n_lists: Optional[int] = None, n_probe: Optional[int] = None,
+              random_state: int = 42, **meta) -> "NeighborsIndex":
+        """Construit l'index ; labels contient les indices des classes dans classes."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n_rows = len(vectors)
+        if n_lists is None:
+            n_lists = 1 if n_rows <= BRUTE_FORCE_MAX_ROWS else min(16384, int(2 * np.sqrt(n_rows)))
+        if n_probe is None:
+            n_probe = 1 if n_lists == 1 else max(8, n_lists // 512)
+
+        if n_lists == 1:
+            centroids = vectors.mean(axis=0, keepdims=True)
+            assignments = np.zeros(n_rows, dtype=np.int32)
+        else:
+            from sklearn.cluster import MiniBatchKMeans
+            rng = np.random.default_rng(random_state)
+            sample = vectors[rng.choice(n_rows, size=min(n_rows, 32 * n_lists), replace=False)]
+            kmeans = MiniBatchKMeans(n_clusters=n_lists, batch_size=16384, n_init=1, max_iter=20,
+                                     random_state=random_state).fit(sample)
+            centroids = kmeans.cluster_centers_.astype(np.float32)
+            assignments = cls._assign(vectors, centroids)
+
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.searchsorted(assignments[order], np.arange(n_lists + 1)).astype(np.int64)
+        sorted_vectors = vectors[order]
+
+        meta = dict(meta, classes=list(classes), feature_names=list(feature_names),
+                    n_lists=int(n_lists), n_probe=int(n_probe))
+        return cls(
+            centroids=centroids,
+            offsets=offsets,
+            vectors=sorted_vectors,
+            norms=np.einsum("ij,ij->i", sorted_vectors, sorted_vectors),
+            labels=np.asarray(labels, dtype=np.int8)[order],
+            row_ids=np.asarray(row_ids, dtype=np.int64)[order],
+            meta=meta
+        )
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, max_cells: int = 32_000_000) -> np.ndarray:
+        """Affecte chaque vecteur à son centroïde le plus proche, par blocs bornés en mémoire."""
+        centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+        chunk = max(1, max_cells // len(centroids))
+        out = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start:start + chunk]
+            out[start:start + chunk] = np.argmin(centroid_norms - 2 * block @ centroids.T, axis=1)
+        return out
+
+    def save(self, directory: str):
+        """Enregistre l'index sous forme de fichiers .npy ouvrables en mémoire partagée."""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.FILES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, directory: str) -> "NeighborsIndex":
+        """Ouvre un index enregistré ; les tableaux volumineux restent sur disque (mmap)."""
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"),
+                          mmap_mode="r" if name in ("vectors", "norms", "labels", "row_ids") else None)
+            for name in cls.FILES
+        }
+        return cls(meta=meta, **arrays)
+
+    def query(self, vector: np.ndarray, k: int = 10,
+              n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Retourne (row_ids, distances, labels) des k voisins les plus proches."""
+        q = np.asarray(vector, dtype=np.float32).ravel()
+        n_lists = len(self.centroids)
+        n_probe = min(n_lists, n_probe or self.n_probe)
+
+        if n_lists == 1:
+            lists = [0]
+        else:
+            centroid_dist = self._centroid_norms - 2 * (self.centroids @ q)
+            lists = np.argpartition(centroid_dist, n_probe - 1)[:n_probe]
+
+        # Les listes sont contiguës : on calcule les distances tranche par tranche, sans
+        # recopier les vecteurs candidats
+        ranges = [(int(self.offsets[l]), int(self.offsets[l + 1])) for l in lists]
+        positions = np.concatenate([np.arange(s, e) for s, e in ranges])
+        distances = np.concatenate([self.norms[s:e] - 2 * (self.vectors[s:e] @ q) for s, e in ranges])
+        distances += q @ q
+
+        k = min(k, len(distances))
+        if k == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, np.empty(0, dtype=np.float32), empty
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        hits = positions[top]
+        return (np.asarray(self.row_ids[hits]), np.sqrt(np.maximum(distances[top], 0)),
+                np.asarray(self.labels[hits]))
+
+    def class_mix(self, labels: np.ndarray) -> Dict[str, float]:
+        """Proportion de chaque classe parmi les voisins retournés."""
+        counts = np.bincount(labels, minlength=len(self.classes))
+        total = max(int(counts.sum()), 1)
+        return {c: counts[i] / total for i, c in enumerate(self.classes) if counts[i]}
+
+def build_dataset_index(model, data: pd.DataFrame, features: Optional[FeatureMatrix] = None,
+                        **kwargs) -> NeighborsIndex:
+    """Construit l'index sur un jeu de données étiqueté (colonne obesite_label).
+
+    Avec features (matrice du magasin, mêmes lignes que data), les profils ne sont pas re-transformés.
+    """
+    preprocessor = get_preprocessor(model)
+    if features is None:
+        vectors, feature_names = transform_profiles(preprocessor, data.drop(columns=["obesite_label"]))
+    else:
+        keep = features.columns(exclude=IGNORED_FEATURES)
+        vectors, feature_names = features.values[:, keep], [features.feature_names[i] for i in keep]
+    classes = sorted(data["obesite_label"].unique())
+    labels = pd.Categorical(data["obesite_label"], categories=classes).codes
+    return NeighborsIndex.build(
+        vectors, labels, data.index.to_numpy(), classes, feature_names,
+        preprocessor_hash=joblib.hash(preprocessor), **kwargs
+    )
+
+def find_similar_profiles(index: NeighborsIndex, preprocessor, input_data: pd.DataFrame,
+                          data: pd.DataFrame, k: int = 10) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """Retourne les k profils étiquetés les plus proches et leur répartition par classe."""
+    vector, _ = transform_profiles(preprocessor, input_data)
+    row_ids, distances, labels = index.query(vector[0], k=k)
+    profiles = data.iloc[row_ids].copy()
+    profiles.insert(0, "distance", distances)
+    return profiles, index.class_mix(labels)
+
+@st.cache_resource
+def load_neighbors_index(_model, data_path: str, index_dir: str,
+                         store_dir: str = FEATURE_STORE_DIR) -> NeighborsIndex:
+    """Charge l'index persistant, ou le reconstruit si le préprocesseur a changé."""
+    preprocessor_hash = joblib.hash(get_preprocessor(_model))
+    try:
+        index = NeighborsIndex.load(index_dir)
+        if index.meta.get("preprocessor_hash") == preprocessor_hash:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = build_dataset_index(_model, load_shared_data(data_path),
+                                load_feature_matrix(_model, data_path, store_dir))
+    index.save(index_dir)
+    return NeighborsIndex.load(index_dir)
+
+if __name__ == "__main__":
+    import argparse
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Construit l'index des profils similaires.")
+    parser.add_argument("--model", default=os.path.join(root, "models", "modele_lgbm.pkl"))
+    parser.add_argument("--data", default=os.path.join(root, "data", "obesite_clean_fr.csv"))
+    parser.add_argument("--out", default=os.path.join(root, "models", "neighbors_index"))
+    parser.add_argument("--store", default=FEATURE_STORE_DIR)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    features = open_features(get_preprocessor(model), args.data, args.store)
+    index = build_dataset_index(model, pd.read_csv(args.data), features)
+    index.save(args.out)
+    print(f"✅ Index de {len(index)} profils enregistré dans {args.out}")
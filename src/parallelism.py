@@ -0,0 +1,74 @@
+import os
+from typing import Any, Dict, Iterator, Optional
+
+from threadpoolctl import threadpool_limits
+
+# Variable d'environnement qui fixe le nombre de cœurs attribués au processus
+# (conteneur limité, ou part d'une étape lancée en parallèle par build.py)
+CORES_ENV = "OBESITE_CPUS"
+
+# Budget de parallélisme par charge de travail. Les cœurs sont d'abord répartis entre
+# workers (processus joblib ou threads d'un pool), puis chaque worker reçoit
+# cores // workers threads natifs (OpenMP de LightGBM, BLAS), plafonnés par max_threads.
+WORKLOADS: Dict[str, Dict[str, Any]] = {
+    # Candidats × plis de la recherche d'hyper-paramètres : un fit par worker
+    'recherche': {'max_threads': None, 'min_workers': 1},
+    # Plis de CalibratedClassifierCV
+    'calibration': {'max_threads': None, 'min_workers': 1},
+    # Blocs de la matrice SHAP globale (TreeSHAP est mono-thread)
+    'shap': {'max_threads': 1, 'min_workers': 1},
+    # Prédictions d'un profil : le coût de lancement des threads OpenMP dépasse le calcul,
+    # on parallélise donc entre sessions (au moins les trois sections de la page Prédiction)
+    'inference': {'max_threads': 1, 'min_workers': 3}
+}
+
+def available_cores() -> int:
+    """Cœurs utilisables par le processus (CORES_ENV, puis affinité CPU)."""
+    if os.environ.get(CORES_ENV):
+        return max(1, int(os.environ[CORES_ENV]))
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def plan_parallelism(workload: str, tasks: Optional[int] = None, cores: Optional[int] = None) -> Dict[str, int]:
+    """Nombre de workers et de threads natifs par worker pour une charge de travail.
+
+    tasks est le nombre de tâches indépendantes (fits, plis, blocs) ; par défaut, autant
+    que de cœurs.
+    """
+    spec = WORKLOADS[workload]
+    cores = cores or available_cores()
+    workers = max(spec['min_workers'], min(cores, tasks or cores))
+    threads = max(1, cores // workers)
+    if spec['max_threads'] is not None:
+        threads = min(threads, spec['max_threads'])
+    return {'workers': workers, 'threads': threads}
+
+def _estimators(model) -> Iterator[Any]:
+    """Parcourt un modèle et ses sous-modèles (cascade, calibration, pipeline)."""
+    yield model
+    if hasattr(model, "expert"):
+        yield from _estimators(model.base)
+        yield from _estimators(model.expert)
+    for calibrated in getattr(model, "calibrated_classifiers_", []):
+        yield from _estimators(calibrated.estimator)
+    if hasattr(model, "named_steps"):
+        for step in model.named_steps.values():
+            yield from _estimators(step)
+
+def set_model_threads(model, threads: int):
+    """Fixe n_jobs des estimateurs finaux qui l'exposent (LightGBM notamment).
+
+    Les méta-estimateurs (ColumnTransformer, calibration) parallélisent par processus
+    et sont laissés tels quels. On lit les attributs plutôt que get_params, qui échoue
+    sur des pipelines picklés avec une autre version de scikit-learn.
+    """
+    for estimator in _estimators(model):
+        composite = any(hasattr(estimator, a) for a in ("named_steps", "transformers", "calibrated_classifiers_"))
+        if not composite and "n_jobs" in vars(estimator):
+            estimator.n_jobs = threads
+    return model
+
+def limit_native_threads(threads: int):
+    """Limite les threads BLAS du processus (sans effet sur les n_jobs explicites)."""
+    threadpool_limits(limits=threads, user_api="blas")
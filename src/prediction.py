@@ -0,0 +1,71 @@
+import time
+import numpy as np
+from typing import Dict, Any, List
+
+try:
+    from utils import (
+        prepare_input_data, get_obesity_labels, get_obesity_labels_numeric,
+        calculate_bmi, get_bmi_category
+    )
+    from schema import SchemaError, validate_frame, check_training_range
+    from counterfactuals import CounterfactualEngine, TIME_BUDGET_MS, has_lower_target
+except ImportError:
+    from src.utils import (
+        prepare_input_data, get_obesity_labels, get_obesity_labels_numeric,
+        calculate_bmi, get_bmi_category
+    )
+    from src.schema import SchemaError, validate_frame, check_training_range
+    from src.counterfactuals import CounterfactualEngine, TIME_BUDGET_MS, has_lower_target
+
+def predict_profile(model, user_inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Calcule la prédiction d'un profil du formulaire, sans rien afficher.
+
+    Lève SchemaError si les données préparées ne respectent pas le schéma du modèle ; les
+    valeurs admises mais hors de la plage d'entraînement sont retournées dans 'range_warnings'.
+    """
+    input_data = prepare_input_data(user_inputs)
+    validation = validate_frame(input_data)
+    if not validation.valid_rows.all():
+        raise SchemaError("; ".join(validation.messages(0)))
+    
+    # Un seul appel : la classe prédite est celle de probabilité maximale
+    probabilities = model.predict_proba(input_data)[0]
+    prediction = model.classes_[np.argmax(probabilities)]
+    
+    # Gérer les prédictions string ou numériques
+    if isinstance(prediction, str):
+        predicted_label = get_obesity_labels().get(prediction, prediction)
+        # Convertir la prédiction string en index pour les couleurs et métriques
+        model_classes = list(model.classes_)
+        prediction_index = model_classes.index(prediction) if prediction in model_classes else 0
+    else:
+        # Prédiction numérique (fallback)
+        predicted_label = get_obesity_labels_numeric().get(prediction, f"Classe {prediction}")
+        prediction_index = prediction
+    
+    bmi = calculate_bmi(user_inputs['poids_kg'], user_inputs['taille_m'])
+    return {
+        'input_data': input_data,
+        'probabilities': probabilities,
+        'prediction': prediction,
+        'predicted_label': predicted_label,
+        'prediction_index': prediction_index,
+        'bmi': bmi,
+        'bmi_category': get_bmi_category(bmi),
+        'range_warnings': check_training_range(input_data).messages(0)
+    }
+
+def compute_counterfactuals(model, user_inputs: Dict[str, Any], prediction: str) -> List[Dict[str, Any]]:
+    """Suggestions contrefactuelles, à poids constant puis avec perte de poids.
+
+    Les deux recherches partagent une même échéance : TIME_BUDGET_MS au total. Vide, sans
+    appel au modèle, si la classe prédite est « Poids normal » ou moins sévère.
+    """
+    if not has_lower_target(prediction):
+        return []
+    deadline = time.perf_counter() + TIME_BUDGET_MS / 1e3
+    engine = CounterfactualEngine(model)
+    suggestions = engine.suggest(user_inputs, prediction, deadline=deadline)
+    if not suggestions:
+        suggestions = engine.suggest(user_inputs, prediction, vary_weight=True, deadline=deadline)
+    return suggestions
@@ -0,0 +1,97 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+try:
+    from parallelism import plan_parallelism
+except ImportError:
+    from src.parallelism import plan_parallelism
+
+# Nombre de threads partagés par toutes les sessions pour les calculs d'arrière-plan
+BACKGROUND_WORKERS = plan_parallelism("inference")["workers"]
+
+@st.cache_resource
+def get_background_executor() -> ThreadPoolExecutor:
+    """Pool de threads unique par processus."""
+    return ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="obesite-bg")
+
+def _run_with_context(ctx, compute: Callable[[], Any]) -> Any:
+    """Exécute un calcul en rattachant le thread à la session (caches Streamlit)."""
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+    return compute()
+
+class ProgressiveRenderer:
+    """Affichage progressif : les sections lentes sont calculées en arrière-plan.
+
+    submit() lance le calcul immédiatement ; render() réserve un emplacement par section,
+    dans l'ordre de soumission, puis y affiche chaque résultat dès qu'il arrive. Une section
+    qui dépasse son délai (compté depuis submit) ou qui échoue affiche son repli.
+    Le rendu reste sur le thread du script : les threads ne font que calculer.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor = None):
+        self.executor = executor or get_background_executor()
+        self.ctx = get_script_run_ctx()
+        self.sections: List[Dict[str, Any]] = []
+
+    def submit(self, title: str, compute: Callable[[], Any], render: Callable[[Any], None],
+               fallback: Callable[[str], None], timeout: float):
+        """Lance le calcul d'une section ; render reçoit le résultat, fallback la raison de l'échec."""
+        self.sections.append({
+            "title": title,
+            "future": self.executor.submit(_run_with_context, self.ctx, compute),
+            "render": render,
+            "fallback": fallback,
+            "deadline": time.monotonic() + timeout
+        })
+
+    def render(self, pending_message: str = "⏳ Calcul en cours..."):
+        """Affiche les sections dans l'ordre de soumission, au fur et à mesure de leur calcul.
+
+        Le résultat (ou la raison du repli) de chaque section est conservé : un nouvel appel,
+        lors d'un rerun, réaffiche les sections terminées sans rien recalculer.
+        """
+        pending: Dict[Future, Dict[str, Any]] = {}
+        for section in self.sections:
+            st.markdown(section["title"])
+            section["placeholder"] = st.empty()
+            if "outcome" in section:
+                self._show(section)
+            else:
+                section["placeholder"].caption(pending_message)
+                pending[section["future"]] = section
+
+        while pending:
+            wait_s = max(0.0, min(s["deadline"] for s in pending.values()) - time.monotonic())
+            done, _ = wait(list(pending), timeout=wait_s, return_when=FIRST_COMPLETED)
+            for future in done:
+                section = pending.pop(future)
+                try:
+                    section["outcome"] = ("render", future.result())
+                except Exception as e:
+                    section["outcome"] = ("fallback", str(e))
+                self._show(section)
+
+            now = time.monotonic()
+            for future, section in list(pending.items()):
+                if now >= section["deadline"]:
+                    # Un calcul déjà démarré ne peut pas être interrompu : il se termine
+                    # en arrière-plan (et remplit les caches), mais n'est plus attendu
+                    future.cancel()
+                    del pending[future]
+                    section["outcome"] = ("fallback", "délai dépassé")
+                    self._show(section)
+
+    @staticmethod
+    def _show(section: Dict[str, Any]):
+        kind, value = section["outcome"]
+        with section["placeholder"].container():
+            try:
+                section[kind](value)
+            except Exception as e:
+                section["fallback"](str(e))
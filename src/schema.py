@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+# Schéma déclaratif des 17 colonnes attendues par le modèle.
+# Les bornes min/max reprennent celles du formulaire (create_input_form) et de validate_inputs ;
+# train_range est la plage observée dans le jeu d'entraînement (obesite_clean_fr.csv), plus
+# étroite : au-delà, le modèle extrapole. Les modalités sont celles vues par le OneHotEncoder.
+MODEL_SCHEMA: Dict[str, Dict[str, Any]] = {
+    'identifiant': {'type': 'int', 'min': 0},
+    'genre': {'type': 'category', 'categories': ['Femme', 'Homme']},
+    'age': {'type': 'int', 'min': 10, 'max': 100, 'train_range': (14, 61)},
+    'taille_m': {'type': 'float', 'min': 1.0, 'max': 2.5, 'train_range': (1.45, 1.98)},
+    'poids_kg': {'type': 'float', 'min': 30, 'max': 300, 'train_range': (39, 165.06)},
+    'antecedents_surpoids_famille': {'type': 'binary'},
+    'consommation_frequent_calorique': {'type': 'binary'},
+    'frequence_legumes': {'type': 'float', 'min': 0, 'max': 5, 'train_range': (1, 3)},
+    'nombre_repas_jour': {'type': 'float', 'min': 1, 'max': 5, 'train_range': (1, 4)},
+    'grignotage': {'type': 'category', 'categories': ['Jamais', 'Parfois', 'Fréquemment', 'Toujours']},
+    'fumeur': {'type': 'binary'},
+    'eau_litres_jour': {'type': 'float', 'min': 0, 'max': 5, 'train_range': (1, 3)},
+    'suivi_calories': {'type': 'binary'},
+    'activite_physique_hebdo': {'type': 'float', 'min': 0, 'max': 7, 'train_range': (0, 3)},
+    'temps_ecran': {'type': 'float', 'min': 0, 'max': 12, 'train_range': (0, 2)},
+    'alcool': {'type': 'category', 'categories': ['Jamais', 'Parfois', 'Fréquemment']},
+    'transport': {'type': 'category',
+                  'categories': ['Marche', 'Vélo', 'Moto', 'Transports_Publics', 'Voiture']}
+}
+
+# Codes d'erreur par cellule (un octet par colonne et par ligne)
+OK = 0
+MISSING_COLUMN = 1
+MISSING_VALUE = 2
+INVALID_TYPE = 3
+NOT_INTEGER = 4
+BELOW_MIN = 5
+ABOVE_MAX = 6
+UNKNOWN_CATEGORY = 7
+NOT_BINARY = 8
+# Avertissement, pas une erreur : valeur admise par le formulaire mais absente de l'entraînement
+OUT_OF_TRAINING_RANGE = 9
+
+ERROR_MESSAGES = {
+    MISSING_COLUMN: "colonne absente",
+    MISSING_VALUE: "valeur manquante",
+    INVALID_TYPE: "valeur non numérique",
+    NOT_INTEGER: "valeur non entière",
+    BELOW_MIN: "valeur inférieure au minimum",
+    ABOVE_MAX: "valeur supérieure au maximum",
+    UNKNOWN_CATEGORY: "modalité inconnue du modèle",
+    NOT_BINARY: "valeur différente de 0 ou 1",
+    OUT_OF_TRAINING_RANGE: "valeur hors de la plage d'entraînement du modèle"
+}
+
+class SchemaError(ValueError):
+    """Levée quand des données ne respectent pas le schéma du modèle."""
+
+class ValidationResult:
+    """Codes d'erreur par ligne et par colonne d'un bloc validé."""
+
+    def __init__(self, codes: np.ndarray, columns: List[str], index: pd.Index):
+        self.codes = codes
+        self.columns = columns
+        self.index = index
+
+    @property
+    def valid_rows(self) -> np.ndarray:
+        """Masque des lignes sans aucune erreur."""
+        return ~self.codes.any(axis=1)
+
+    @property
+    def row_codes(self) -> np.ndarray:
+        """Premier code d'erreur non nul de chaque ligne (0 si la ligne est valide)."""
+        first = np.argmax(self.codes != OK, axis=1)
+        return self.codes[np.arange(len(self.codes)), first]
+
+    def summary(self) -> pd.DataFrame:
+        """Nombre de lignes en erreur par colonne et par code."""
+        rows = []
+        for j, column in enumerate(self.columns):
+            counts = np.bincount(self.codes[:, j], minlength=len(ERROR_MESSAGES) + 1)
+            for code in np.flatnonzero(counts[1:]) + 1:
+                rows.append({'colonne': column, 'code': int(code),
+                             'erreur': ERROR_MESSAGES[code], 'lignes': int(counts[code])})
+        return pd.DataFrame(rows, columns=['colonne', 'code', 'erreur', 'lignes'])
+
+    def messages(self, row: int = 0) -> List[str]:
+        """Messages lisibles des erreurs d'une ligne."""
+        return [f"{self.columns[j]} : {ERROR_MESSAGES[code]}"
+                for j, code in enumerate(self.codes[row]) if code != OK]
+
+def _check_numeric(values: pd.Series, spec: Dict[str, Any]) -> np.ndarray:
+    """Codes d'erreur d'une colonne numérique, calculés en une passe vectorisée."""
+    codes = np.zeros(len(values), dtype=np.uint8)
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        numbers = values.to_numpy(dtype=float, na_value=np.nan)
+        missing = np.isnan(numbers)
+    else:
+        numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        missing = values.isna().to_numpy()
+        codes[np.isnan(numbers) & ~missing] = INVALID_TYPE
+    codes[missing] = MISSING_VALUE
+
+    finite = ~np.isnan(numbers)
+    if spec['type'] == 'binary':
+        codes[finite & (numbers != 0) & (numbers != 1)] = NOT_BINARY
+        return codes
+    if spec['type'] == 'int':
+        codes[finite & (numbers != np.round(numbers))] = NOT_INTEGER
+    if 'min' in spec:
+        codes[finite & (numbers < spec['min'])] = BELOW_MIN
+    if 'max' in spec:
+        codes[finite & (numbers > spec['max'])] = ABOVE_MAX
+    return codes
+
+def _check_category(values: pd.Series, spec: Dict[str, Any]) -> np.ndarray:
+    """Codes d'erreur d'une colonne catégorielle."""
+    codes = np.zeros(len(values), dtype=np.uint8)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # On ne teste que les modalités déclarées, puis on projette par les codes
+        known = np.append(values.cat.categories.isin(spec['categories']), True)
+        cat_codes = values.cat.codes.to_numpy()
+        codes[~known[cat_codes]] = UNKNOWN_CATEGORY
+        codes[cat_codes < 0] = MISSING_VALUE
+        return codes
+    missing = values.isna().to_numpy()
+    codes[~values.isin(spec['categories']).to_numpy() & ~missing] = UNKNOWN_CATEGORY
+    codes[missing] = MISSING_VALUE
+    return codes
+
+def validate_frame(frame: pd.DataFrame, schema: Optional[Dict[str, Dict[str, Any]]] = None) -> ValidationResult:
+    """Valide un bloc de lignes colonne par colonne, sans s'arrêter à la première erreur."""
+    schema = schema or MODEL_SCHEMA
+    columns = list(schema)
+    codes = np.zeros((len(frame), len(columns)), dtype=np.uint8)
+    for j, column in enumerate(columns):
+        spec = schema[column]
+        if column not in frame.columns:
+            codes[:, j] = MISSING_COLUMN
+        elif spec['type'] == 'category':
+            codes[:, j] = _check_category(frame[column], spec)
+        else:
+            codes[:, j] = _check_numeric(frame[column], spec)
+    return ValidationResult(codes, columns, frame.index)
+
+def check_training_range(frame: pd.DataFrame,
+                         schema: Optional[Dict[str, Dict[str, Any]]] = None) -> ValidationResult:
+    """Signale les valeurs hors de train_range (code OUT_OF_TRAINING_RANGE), sans les rejeter.
+
+    À appeler sur des données déjà validées par validate_frame : les valeurs absentes ou
+    non numériques ne sont pas signalées ici.
+    """
+    schema = schema or MODEL_SCHEMA
+    columns = list(schema)
+    codes = np.zeros((len(frame), len(columns)), dtype=np.uint8)
+    for j, column in enumerate(columns):
+        if 'train_range' not in schema[column] or column not in frame.columns:
+            continue
+        low, high = schema[column]['train_range']
+        numbers = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        codes[(numbers < low) | (numbers > high), j] = OUT_OF_TRAINING_RANGE
+    return ValidationResult(codes, columns, frame.index)
+
+def validate_chunks(chunks: Iterable[pd.DataFrame],
+                    schema: Optional[Dict[str, Dict[str, Any]]] = None) -> Iterator[ValidationResult]:
+    """Valide un flux de blocs (par exemple pd.read_csv(..., chunksize=...))."""
+    for chunk in chunks:
+        yield validate_frame(chunk, schema)
+
+def validate_csv(path: str, chunksize: int = 500_000,
+                 schema: Optional[Dict[str, Dict[str, Any]]] = None) -> pd.DataFrame:
+    """Valide un fichier CSV par blocs et retourne le résumé des erreurs."""
+    summaries = [result.summary() for result in validate_chunks(pd.read_csv(path, chunksize=chunksize), schema)]
+    summary = pd.concat(summaries, ignore_index=True)
+    if summary.empty:
+        return summary
+    return summary.groupby(['colonne', 'code', 'erreur'], as_index=False)['lignes'].sum()
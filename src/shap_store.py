@@ -0,0 +1,234 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Dict, List, Optional
+
+try:
+    from utils import get_pipeline
+    from analysis_cube import BMI_BANDS, bucketize
+    from parallelism import plan_parallelism
+    from feature_store import FEATURE_STORE_DIR, FeatureMatrix, load_feature_matrix, open_features
+except ImportError:
+    from src.utils import get_pipeline
+    from src.analysis_cube import BMI_BANDS, bucketize
+    from src.parallelism import plan_parallelism
+    from src.feature_store import FEATURE_STORE_DIR, FeatureMatrix, load_feature_matrix, open_features
+
+# Nombre de profils de référence pour l'explainer linéaire
+BACKGROUND_SIZE = 200
+# L'identifiant n'est qu'un numéro de ligne : sa contribution n'a pas de sens pour l'utilisateur
+HIDDEN_FEATURES = ["identifiant"]
+
+# Explainer du processus courant, construit une seule fois par worker (_init_worker)
+_worker_explainer = None
+
+def _dense(matrix) -> np.ndarray:
+    """Matrice dense float64 attendue par les explainers SHAP."""
+    if hasattr(matrix, "toarray"):
+        matrix = matrix.toarray()
+    return np.asarray(matrix, dtype=np.float64)
+
+def _make_explainer(estimator, background: np.ndarray):
+    """TreeSHAP pour les modèles à arbres, SHAP linéaire pour la baseline logistique."""
+    import shap
+    if hasattr(estimator, "coef_"):
+        return shap.LinearExplainer(estimator, background)
+    return shap.TreeExplainer(estimator)
+
+def _init_worker(estimator, background: np.ndarray):
+    global _worker_explainer
+    _worker_explainer = _make_explainer(estimator, background)
+
+def _shap_chunk(chunk: np.ndarray) -> np.ndarray:
+    """Calcule les valeurs SHAP d'un bloc de lignes, au format (lignes, variables, classes)."""
+    values = _worker_explainer.shap_values(_dense(chunk))
+    if isinstance(values, list):
+        values = np.stack(values, axis=-1)
+    return np.asarray(values, dtype=np.float32)
+
+def compute_shap_store(model, X: pd.DataFrame, y: pd.Series, out_dir: str,
+                       chunk_size: int = 500, n_jobs: Optional[int] = None,
+                       features: Optional[FeatureMatrix] = None) -> "ShapStore":
+    """Calcule les valeurs SHAP de X par blocs parallèles et les enregistre dans out_dir.
+
+    Pour un modèle calibré, on explique le pipeline du premier pli de calibration,
+    comme dans le notebook. Sans n_jobs, un worker par bloc dans la limite du budget 'shap' ;
+    chaque worker construit son explainer une fois, puis traite ses blocs.
+    Avec features (matrice du magasin de X), les blocs sont lus dans la projection mmap.
+    """
+    pipeline = get_pipeline(model)
+    preprocessor = pipeline.named_steps["preprocess"]
+    estimator = pipeline.named_steps["model"]
+
+    X_trans = _dense(preprocessor.transform(X)) if features is None else features.values
+    background = _dense(X_trans[np.random.default_rng(42).choice(len(X_trans), min(BACKGROUND_SIZE, len(X_trans)),
+                                                                  replace=False)])
+
+    bounds = [(s, min(s + chunk_size, len(X_trans))) for s in range(0, len(X_trans), chunk_size)]
+    workers = n_jobs or plan_parallelism("shap", tasks=len(bounds))["workers"]
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(estimator, background)) as pool:
+            chunks = list(pool.map(_shap_chunk, (np.asarray(X_trans[s:e]) for s, e in bounds)))
+    else:
+        _init_worker(estimator, background)
+        chunks = [_shap_chunk(X_trans[s:e]) for s, e in bounds]
+
+    os.makedirs(out_dir, exist_ok=True)
+    shape = (len(X_trans),) + chunks[0].shape[1:]
+    values = np.lib.format.open_memmap(os.path.join(out_dir, "shap_values.npy"),
+                                       mode="w+", dtype=np.float32, shape=shape)
+    for (s, e), chunk in zip(bounds, chunks):
+        values[s:e] = chunk
+    values.flush()
+    del values
+
+    bmi = X["poids_kg"].to_numpy(dtype=float) / X["taille_m"].to_numpy(dtype=float) ** 2
+    rows = pd.DataFrame({
+        "identifiant": X["identifiant"].to_numpy(),
+        "genre": X["genre"].to_numpy(),
+        "tranche_imc": np.asarray(BMI_BANDS[1])[bucketize(bmi, BMI_BANDS)],
+        "classe_reelle": np.asarray(y),
+        "classe_predite": model.predict(X)
+    })
+    rows.to_csv(os.path.join(out_dir, "rows.csv"), index=False)
+
+    meta = {
+        "feature_names": [n.split("__", 1)[-1] for n in preprocessor.get_feature_names_out()],
+        "classes": [str(c) for c in estimator.classes_],
+        "explainer": "LinearExplainer" if hasattr(estimator, "coef_") else "TreeExplainer",
+        "model_hash": joblib.hash(model),
+        # Pipeline expliqué : identique en mode cascade (pipeline de l'expert)
+        "pipeline_hash": joblib.hash(pipeline)
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return ShapStore.load(out_dir)
+
+class ShapStore:
+    """Matrice SHAP globale pré-calculée (lignes × variables × classes), ouverte en mmap."""
+
+    def __init__(self, values: np.ndarray, rows: pd.DataFrame, meta: Dict):
+        self.values = values
+        self.rows = rows
+        self.meta = meta
+        self.feature_names: List[str] = meta["feature_names"]
+        self.classes: List[str] = meta["classes"]
+
+    @classmethod
+    def load(cls, directory: str) -> "ShapStore":
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        values = np.load(os.path.join(directory, "shap_values.npy"), mmap_mode="r")
+        rows = pd.read_csv(os.path.join(directory, "rows.csv"))
+        return cls(values, rows, meta)
+
+    def row_mask(self, genre: Optional[str] = None, bmi_band: Optional[str] = None,
+                 class_name: Optional[str] = None) -> np.ndarray:
+        """Masque des lignes correspondant aux filtres (None = pas de filtre)."""
+        mask = np.ones(len(self.rows), dtype=bool)
+        if genre:
+            mask &= self.rows["genre"].to_numpy() == genre
+        if bmi_band:
+            mask &= self.rows["tranche_imc"].to_numpy() == bmi_band
+        if class_name:
+            mask &= self.rows["classe_predite"].to_numpy() == class_name
+        return mask
+
+    def mean_abs(self, class_name: Optional[str] = None, genre: Optional[str] = None,
+                 bmi_band: Optional[str] = None) -> pd.Series:
+        """Moyenne de |SHAP| par variable sur les lignes filtrées.
+
+        Avec une classe, on retient les lignes prédites dans cette classe et la sortie
+        du modèle pour cette classe ; sans classe, on moyenne sur toutes les sorties.
+        """
+        mask = self.row_mask(genre, bmi_band, class_name)
+        if not mask.any():
+            return pd.Series(0.0, index=self.feature_names).drop(labels=HIDDEN_FEATURES, errors="ignore")
+        selected = self.values[mask]
+        if class_name:
+            selected = selected[:, :, self.classes.index(class_name)]
+            importance = np.abs(selected).mean(axis=0)
+        else:
+            importance = np.abs(selected).mean(axis=(0, 2))
+        importance = pd.Series(importance, index=self.feature_names).drop(labels=HIDDEN_FEATURES, errors="ignore")
+        return importance.sort_values(ascending=False)
+
+def is_current(store: ShapStore, model) -> bool:
+    """Vrai si la matrice a été calculée pour ce modèle (celui expliqué, en mode cascade)."""
+    if "pipeline_hash" in store.meta:
+        return store.meta["pipeline_hash"] == joblib.hash(get_pipeline(model))
+    return store.meta.get("model_hash") == joblib.hash(model)
+
+def load_shap_store(_model, directory: str) -> Optional[ShapStore]:
+    """Charge la matrice SHAP pré-calculée, ou None si le job n'a pas encore tourné
+    ou si elle a été calculée pour un autre modèle (recalcul : python src/shap_store.py).
+
+    L'absence de matrice n'est pas mise en cache, et le cache suit la date de meta.json
+    (écrit en dernier) : un recalcul est pris en compte sans redémarrer l'application.
+    """
+    try:
+        version = os.path.getmtime(os.path.join(directory, "meta.json"))
+    except OSError:
+        return None
+    return _load_shap_store(_model, directory, version)
+
+@st.cache_resource
+def _load_shap_store(_model, directory: str, version: float) -> Optional[ShapStore]:
+    """Matrice d'une version de meta.json, partagée par toutes les sessions."""
+    try:
+        store = ShapStore.load(directory)
+    except (OSError, ValueError, KeyError):
+        return None
+    return store if is_current(store, _model) else None
+
+@st.cache_resource(show_spinner=False)
+def load_local_explainer(_model, data_path: str, store_dir: str = FEATURE_STORE_DIR):
+    """Construit une fois par processus l'explainer SHAP d'un profil individuel.
+
+    La construction d'un TreeExplainer prend plusieurs secondes : elle est faite en
+    arrière-plan au premier appel, puis partagée par toutes les sessions. Les profils
+    de référence sont lus dans la matrice transformée du magasin.
+    """
+    pipeline = get_pipeline(_model)
+    features = load_feature_matrix(_model, data_path, store_dir)
+    # Mêmes lignes que data.sample(BACKGROUND_SIZE, random_state=42)
+    rows = np.random.RandomState(42).choice(len(features), min(BACKGROUND_SIZE, len(features)), replace=False)
+    return _make_explainer(pipeline.named_steps["model"], _dense(features.values[np.sort(rows)]))
+
+def explain_instance(explainer, model, input_data: pd.DataFrame, class_name: str) -> pd.Series:
+    """Contributions SHAP d'un profil pour une classe, triées par importance absolue."""
+    pipeline = get_pipeline(model)
+    preprocessor = pipeline.named_steps["preprocess"]
+    values = explainer.shap_values(_dense(preprocessor.transform(input_data)))
+    if isinstance(values, list):
+        values = np.stack(values, axis=-1)
+    classes = [str(c) for c in pipeline.named_steps["model"].classes_]
+    contributions = np.asarray(values)[0, :, classes.index(class_name)]
+    names = [n.split("__", 1)[-1] for n in preprocessor.get_feature_names_out()]
+    series = pd.Series(contributions, index=names).drop(labels=HIDDEN_FEATURES, errors="ignore")
+    return series.reindex(series.abs().sort_values(ascending=False).index)
+
+if __name__ == "__main__":
+    import argparse
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Pré-calcule la matrice SHAP globale du jeu de test.")
+    parser.add_argument("--model", default=os.path.join(root, "models", "modele_lgbm.pkl"))
+    parser.add_argument("--X", default=os.path.join(root, "data", "X_test.csv"))
+    parser.add_argument("--y", default=os.path.join(root, "data", "y_test.csv"))
+    parser.add_argument("--out", default=os.path.join(root, "assets", "shap_values"))
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--store", default=FEATURE_STORE_DIR)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    store = compute_shap_store(
+        model, pd.read_csv(args.X), pd.read_csv(args.y).squeeze(), args.out, chunk_size=args.chunk_size,
+        n_jobs=args.n_jobs, features=open_features(get_pipeline(model).named_steps["preprocess"], args.X, args.store)
+    )
+    print(f"✅ Valeurs SHAP {store.values.shape} enregistrées dans {args.out}")
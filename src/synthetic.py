@@ -0,0 +1,176 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+from typing import Dict, Any, Iterator, List
+
+try:
+    from schema import MODEL_SCHEMA, SchemaError, validate_frame
+except ImportError:
+    from src.schema import MODEL_SCHEMA, SchemaError, validate_frame
+
+TARGET = "obesite_label"
+# Variables numériques (binaires comprises) tirées conjointement par la copule
+NUMERIC_COLUMNS = [c for c, spec in MODEL_SCHEMA.items() if spec['type'] != 'category' and c != 'identifiant']
+# Variables catégorielles tirées selon leurs fréquences dans le groupe (hors genre, qui définit le groupe)
+CATEGORY_COLUMNS = [c for c, spec in MODEL_SCHEMA.items() if spec['type'] == 'category' and c != 'genre']
+# En dessous, un groupe (classe, genre) reprend la copule de toute sa classe
+MIN_GROUP_ROWS = 50
+
+def _normal_scores(values: np.ndarray) -> np.ndarray:
+    """Scores normaux des rangs (ex aequo moyennés), colonne par colonne."""
+    ranks = pd.DataFrame(values).rank(method="average").to_numpy()
+    return ndtri((ranks - 0.5) / len(values))
+
+def _correlation_factor(scores: np.ndarray) -> np.ndarray:
+    """Facteur de Cholesky de la corrélation des scores, rendue définie positive."""
+    # Une colonne constante dans le groupe (ex. aucun fumeur) n'est corrélée à rien
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.nan_to_num(np.corrcoef(scores, rowvar=False))
+    np.fill_diagonal(corr, 1.0)
+    eigenvalues, eigenvectors = np.linalg.eigh(corr)
+    corr = eigenvectors @ np.diag(np.clip(eigenvalues, 1e-6, None)) @ eigenvectors.T
+    scale = np.sqrt(np.diag(corr))
+    return np.linalg.cholesky(corr / np.outer(scale, scale))
+
+def _fit_copula(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Marges empiriques triées et corrélation de rangs des variables numériques d'un groupe."""
+    values = frame[NUMERIC_COLUMNS].to_numpy(dtype=float)
+    return {
+        'sorted': np.sort(values, axis=0),
+        'factor': _correlation_factor(_normal_scores(values))
+    }
+
+def _fit_categories(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Modalités et fréquences cumulées de chaque variable catégorielle d'un groupe."""
+    categories = {}
+    for column in CATEGORY_COLUMNS:
+        freqs = frame[column].value_counts(normalize=True)
+        categories[column] = (freqs.index.to_numpy(dtype=object), np.cumsum(freqs.to_numpy()))
+    return categories
+
+class SyntheticPopulation:
+    """Générateur de populations synthétiques calqué sur obesite_clean_fr.csv.
+
+    Par classe d'obésité puis par genre : marges empiriques exactes des variables
+    numériques, reliées par une copule gaussienne (corrélations de rangs, dont taille et
+    poids), et fréquences des modalités catégorielles. Les valeurs tirées sont des
+    valeurs observées : les lignes générées respectent le schéma du modèle.
+    """
+
+    def __init__(self, labels: np.ndarray, label_probs: np.ndarray, genres: np.ndarray,
+                 genre_probs: np.ndarray, groups: List[Dict[str, Any]], dtypes: Dict[str, str]):
+        self.labels = labels
+        self.label_probs = label_probs
+        self.genres = genres
+        # genre_probs[i, j] : probabilité du genre j sachant la classe i
+        self.genre_probs = genre_probs
+        # groups[i * len(genres) + j] : modèle du groupe (classe i, genre j)
+        self.groups = groups
+        # Ordre des colonnes et types numériques du dataset d'origine
+        self.dtypes = dtypes
+
+    @classmethod
+    def fit(cls, data: pd.DataFrame) -> "SyntheticPopulation":
+        labels = np.sort(data[TARGET].unique()).astype(object)
+        genres = np.sort(data['genre'].unique()).astype(object)
+        label_probs = data[TARGET].value_counts(normalize=True).reindex(labels).to_numpy()
+        genre_probs = (pd.crosstab(data[TARGET], data['genre'], normalize="index")
+                       .reindex(index=labels, columns=genres, fill_value=0).to_numpy())
+
+        groups = []
+        for label in labels:
+            by_label = data[data[TARGET] == label]
+            for genre in genres:
+                group = by_label[by_label['genre'] == genre]
+                source = group if len(group) >= MIN_GROUP_ROWS else by_label
+                groups.append({'copula': _fit_copula(source), 'categories': _fit_categories(source)})
+        dtypes = {c: str(data[c].dtype) if c in NUMERIC_COLUMNS + ['identifiant'] else "object"
+                  for c in data.columns}
+        return cls(labels, label_probs, genres, genre_probs, groups, dtypes)
+
+    def sample(self, n_rows: int, rng: np.random.Generator, start_id: int = 0) -> pd.DataFrame:
+        """Tire n_rows profils : classe, genre, puis variables conditionnellement au groupe."""
+        label_idx = np.searchsorted(np.cumsum(self.label_probs), rng.random(n_rows), side="right")
+        label_idx = np.minimum(label_idx, len(self.labels) - 1)
+        genre_cum = np.cumsum(self.genre_probs, axis=1)[label_idx]
+        genre_idx = np.minimum((rng.random(n_rows)[:, None] >= genre_cum).sum(axis=1), len(self.genres) - 1)
+        group_idx = label_idx * len(self.genres) + genre_idx
+
+        numeric = np.empty((n_rows, len(NUMERIC_COLUMNS)))
+        categories = {c: np.empty(n_rows, dtype=object) for c in CATEGORY_COLUMNS}
+        for g in np.unique(group_idx):
+            rows = np.flatnonzero(group_idx == g)
+            copula = self.groups[g]['copula']
+            sorted_values = copula['sorted']
+            # Quantiles empiriques (fonction en escalier) des uniformes corrélées
+            u = ndtr(rng.standard_normal((len(rows), sorted_values.shape[1])) @ copula['factor'].T)
+            positions = np.minimum((u * len(sorted_values)).astype(np.int64), len(sorted_values) - 1)
+            numeric[rows] = np.take_along_axis(sorted_values, positions, axis=0)
+            for column, (values, cumulative) in self.groups[g]['categories'].items():
+                picks = np.searchsorted(cumulative, rng.random(len(rows)), side="right")
+                categories[column][rows] = values[np.minimum(picks, len(values) - 1)]
+
+        columns = dict(zip(NUMERIC_COLUMNS, numeric.T), **categories)
+        columns['identifiant'] = np.arange(start_id, start_id + n_rows)
+        columns['genre'] = self.genres[genre_idx]
+        columns[TARGET] = self.labels[label_idx]
+        return pd.DataFrame({c: columns[c].astype(dtype) for c, dtype in self.dtypes.items()})
+
+    def generate(self, n_rows: int, chunk_size: int = 500_000, seed: int = 42,
+                 validate: bool = True) -> Iterator[pd.DataFrame]:
+        """Produit n_rows lignes par blocs ; même graine et même taille de bloc, mêmes lignes.
+
+        Chaque bloc a son propre générateur, dérivé de la graine et de son numéro. Lève
+        SchemaError si un bloc ne respecte pas le schéma du modèle.
+        """
+        for chunk, start in enumerate(range(0, n_rows, chunk_size)):
+            rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk,)))
+            frame = self.sample(min(chunk_size, n_rows - start), rng, start_id=start)
+            if validate:
+                result = validate_frame(frame)
+                if not result.valid_rows.all():
+                    raise SchemaError(f"Bloc {chunk} : " + "; ".join(result.messages(int(np.argmin(result.valid_rows)))))
+            yield frame
+
+def write_population(population: SyntheticPopulation, path: str, n_rows: int,
+                     chunk_size: int = 500_000, seed: int = 42) -> int:
+    """Écrit une population synthétique en CSV, bloc par bloc, et retourne le nombre de lignes."""
+    written = 0
+    for chunk in population.generate(n_rows, chunk_size, seed):
+        chunk.to_csv(path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+        written += len(chunk)
+    return written
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Génère une population synthétique au format obesite_clean_fr.csv.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data", default=os.path.join(root, "data", "obesite_clean_fr.csv"))
+    parser.add_argument("--out", default=os.path.join(root, "data", "synthetic.csv"))
+    args = parser.parse_args()
+
+    real = pd.read_csv(args.data)
+    population = SyntheticPopulation.fit(real)
+    start = time.perf_counter()
+    written = write_population(population, args.out, args.rows, args.chunk_size, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {written:,} lignes écrites dans {args.out} en {elapsed:.1f} s "
+          f"({written / elapsed:,.0f} lignes/s, graine {args.seed})")
+
+    # Fidélité sur le premier bloc : effectifs par classe et corrélation taille / poids par genre
+    sample = next(population.generate(min(args.rows, args.chunk_size), args.chunk_size, args.seed))
+    shares = pd.DataFrame({
+        "réel": real[TARGET].value_counts(normalize=True),
+        "synthétique": sample[TARGET].value_counts(normalize=True)
+    }).round(3)
+    print(shares.to_string())
+    for genre in population.genres:
+        corr = [frame.loc[frame['genre'] == genre, ['taille_m', 'poids_kg']].corr().iloc[0, 1]
+                for frame in (real, sample)]
+        print(f"corrélation taille / poids ({genre}) : réel {corr[0]:.2f}, synthétique {corr[1]:.2f}")
@@ -1,135 +1,232 @@
+import threading
 import streamlit as st
 import plotly.graph_objects as go
-import plotly.express as px
+import plotly.io as pio
+from plotly.subplots import make_subplots
+from plotly.colors import sample_colorscale
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import shap
 import matplotlib.pyplot as plt
 from PIL import Image
 import io
-import base64
+
+# Bornes supérieures des catégories d'IMC avec leur couleur et leur libellé
+_BMI_BANDS = [
+    (18.5, "#4CAF50", "Insuffisance pondérale"),
+    (25, "#8BC34A", "Poids normal"),
+    (30, "#FFC107", "Surpoids"),
+    (float("inf"), "#F44336", "Obésité")
+]
+
+class FigureFactory:
+    """Fabrique de graphiques Plotly dont la partie statique est construite une seule fois."""
+
+    def __init__(self):
+        self._template = self._build_template(["indicator", "bar", "scatter"])
+        self._gauge_spec = self._build_gauge_spec()
+        self._bmi_spec = self._build_bmi_spec()
+        self._prediction_spec = self._build_prediction_spec()
+        # Partagé entre les sessions (get_figure_factory) : rempli sous verrou
+        self._sensitivity_layouts: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        self._sensitivity_lock = threading.Lock()
+
+    @staticmethod
+    def _build_template(trace_types: List[str]) -> Dict[str, Any]:
+        """Réduit le template actif à sa mise en page et aux types de traces utilisés."""
+        template = pio.templates[pio.templates.default].to_plotly_json()
+        data = template.get("data", {})
+        return {
+            "layout": template.get("layout", {}),
+            "data": {t: data[t] for t in trace_types if t in data}
+        }
+
+    def _base_layout(self, height: int, **kwargs) -> Dict[str, Any]:
+        """Mise en page commune à tous les graphiques."""
+        return dict(
+            template=self._template,
+            height=height,
+            margin=dict(l=20, r=20, t=40, b=20),
+            paper_bgcolor="rgba(0,0,0,0)",
+            plot_bgcolor="rgba(0,0,0,0)",
+            **kwargs
+        )
+
+    def _build_gauge_spec(self) -> Dict[str, Any]:
+        return {
+            "data": [{
+                "type": "indicator",
+                "mode": "gauge+number+delta",
+                "domain": {'x': [0, 1], 'y': [0, 1]},
+                "gauge": {
+                    'axis': {'range': [None, 100]},
+                    'steps': [
+                        {'range': [0, 25], 'color': "lightgray"},
+                        {'range': [25, 50], 'color': "gray"},
+                        {'range': [50, 75], 'color': "lightblue"},
+                        {'range': [75, 100], 'color': "blue"}
+                    ],
+                    'threshold': {
+                        'line': {'color': "red", 'width': 4},
+                        'thickness': 0.75,
+                        'value': 90
+                    }
+                }
+            }],
+            "layout": self._base_layout(300)
+        }
+
+    def _build_bmi_spec(self) -> Dict[str, Any]:
+        return {
+            "data": [{
+                "type": "indicator",
+                "mode": "gauge+number",
+                "domain": {'x': [0, 1], 'y': [0, 1]},
+                "number": {'suffix': " kg/m²", 'font': {'size': 24}},
+                "gauge": {
+                    'axis': {'range': [15, 40], 'tickwidth': 1},
+                    'steps': [
+                        {'range': [15, 18.5], 'color': "#E3F2FD"},
+                        {'range': [18.5, 25], 'color': "#C8E6C9"},
+                        {'range': [25, 30], 'color': "#FFF3E0"},
+                        {'range': [30, 40], 'color': "#FFEBEE"}
+                    ]
+                }
+            }],
+            "layout": self._base_layout(250)
+        }
+
+    def _build_prediction_spec(self) -> Dict[str, Any]:
+        return {
+            "data": [{
+                "type": "bar",
+                "orientation": 'h',
+                "marker": dict(colorscale='RdYlGn_r', showscale=False),
+                "textposition": 'auto'
+            }],
+            "layout": self._base_layout(
+                400,
+                title="Probabilités de classification",
+                xaxis_title="Probabilité (%)",
+                yaxis_title="Catégorie d'obésité"
+            )
+        }
+
+    @staticmethod
+    def _render(spec: Dict[str, Any], trace: Dict[str, Any]) -> go.Figure:
+        """Assemble une figure à partir de la spec statique et de la trace patchée."""
+        return go.Figure({"data": [trace], "layout": spec["layout"]})
+
+    def gauge(self, value: float, title: str, color: str) -> go.Figure:
+        """Jauge générique : seuls la valeur, le titre et la couleur changent."""
+        base = self._gauge_spec["data"][0]
+        trace = dict(base, value=value, title={'text': title, 'font': {'size': 20}})
+        trace["gauge"] = dict(base["gauge"], bar={'color': color})
+        return self._render(self._gauge_spec, trace)
+
+    def bmi_indicator(self, bmi: float) -> go.Figure:
+        """Indicateur d'IMC : seuls la valeur, la catégorie et la couleur changent."""
+        color, category = _BMI_BANDS[-1][1:]
+        for upper, band_color, band_category in _BMI_BANDS:
+            if bmi < upper:
+                color, category = band_color, band_category
+                break
+
+        base = self._bmi_spec["data"][0]
+        trace = dict(base, value=bmi, title={'text': f"IMC: {category}", 'font': {'size': 18}})
+        trace["gauge"] = dict(
+            base["gauge"],
+            bar={'color': color, 'thickness': 0.3},
+            threshold={'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': bmi}
+        )
+        return self._render(self._bmi_spec, trace)
+
+    def prediction_chart(self, probabilities: np.ndarray, labels: Dict[int, str]) -> go.Figure:
+        """Barres de probabilités triées par ordre croissant."""
+        values = np.asarray(probabilities, dtype=float) * 100
+        order = np.argsort(values, kind="stable")
+        sorted_values = values[order].tolist()
+
+        base = self._prediction_spec["data"][0]
+        trace = dict(
+            base,
+            y=[labels[i] for i in order],
+            x=sorted_values,
+            text=[f"{p:.1f}%" for p in sorted_values]
+        )
+        trace["marker"] = dict(base["marker"], color=sorted_values)
+        return self._render(self._prediction_spec, trace)
+
+    def _sensitivity_layout(self, names: Tuple[str, ...], features: Dict[str, Dict[str, Any]],
+                            columns: int) -> Dict[str, Any]:
+        """Mise en page des panneaux de sensibilité, construite une fois par jeu de variables."""
+        with self._sensitivity_lock:
+            if names not in self._sensitivity_layouts:
+                rows = -(-len(names) // columns)
+                grid = make_subplots(rows=rows, cols=min(columns, len(names)), shared_yaxes=True,
+                                     subplot_titles=[f"{features[f]['label']} ({features[f]['unit']})" for f in names],
+                                     horizontal_spacing=0.04, vertical_spacing=0.18)
+                grid.update_yaxes(range=[0, 100], ticksuffix="%")
+                layout = grid.to_plotly_json()["layout"]
+                layout.update(self._base_layout(280 * rows, legend=dict(orientation="h", y=-0.15)))
+                self._sensitivity_layouts[names] = layout
+            return self._sensitivity_layouts[names]
+
+    def sensitivity_chart(self, curves: pd.DataFrame, classes: List[str], labels: Dict[str, str],
+                          features: Dict[str, Dict[str, Any]], columns: int = 3) -> go.Figure:
+        """Courbes de probabilité par classe, un panneau par variable (sortie de compute_sensitivity)."""
+        present = set(curves["variable"])
+        names = tuple(f for f in features if f in present)
+        layout = dict(self._sensitivity_layout(names, features, columns))
+        # Une couleur par classe, du vert (moins sévère) au rouge, dans l'ordre de classes
+        colors = sample_colorscale("RdYlGn_r", np.linspace(0, 1, len(classes)))
+        traces, shapes = [], []
+        for i, feature in enumerate(names):
+            axis = "" if i == 0 else str(i + 1)
+            panel = curves[curves["variable"] == feature]
+            x = panel["valeur"].tolist()
+            for cls, color in zip(classes, colors):
+                traces.append({
+                    "type": "scatter", "mode": "lines", "x": x, "y": (panel[cls] * 100).tolist(),
+                    "name": labels.get(cls, cls), "legendgroup": cls, "showlegend": i == 0,
+                    "line": {"color": color, "width": 2}, "hovertemplate": "%{x:.1f} → %{y:.0f}%",
+                    "xaxis": f"x{axis}", "yaxis": f"y{axis}"
+                })
+            current = panel.loc[panel["is_current"], "valeur"]
+            if len(current):
+                shapes.append({
+                    "type": "line", "x0": float(current.iloc[0]), "x1": float(current.iloc[0]),
+                    "y0": 0, "y1": 1, "xref": f"x{axis}", "yref": f"y{axis} domain",
+                    "line": {"color": "gray", "dash": "dot", "width": 1}
+                })
+        layout["shapes"] = shapes
+        # Traces de structure fixe : la validation de plotly (trace par trace) coûterait plus que le tracé.
+        # st.plotly_chart reçoit un go.Figure : il le convertit (to_dict) sans le re-valider, ce qu'il
+        # ferait pour un dict ; benchmarks/bench_figures.py mesure ce chemin complet.
+        return go.Figure({"data": traces, "layout": layout}, _validate=False)
+
+@st.cache_resource
+def get_figure_factory() -> FigureFactory:
+    """Retourne la fabrique de graphiques partagée entre les sessions."""
+    return FigureFactory()
 
 def create_gauge_chart(value: float, title: str, color: str) -> go.Figure:
     """Crée un graphique en jauge pour afficher une métrique."""
-    fig = go.Figure(go.Indicator(
-        mode = "gauge+number+delta",
-        value = value,
-        domain = {'x': [0, 1], 'y': [0, 1]},
-        title = {'text': title, 'font': {'size': 20}},
-        gauge = {
-            'axis': {'range': [None, 100]},
-            'bar': {'color': color},
-            'steps': [
-                {'range': [0, 25], 'color': "lightgray"},
-                {'range': [25, 50], 'color': "gray"},
-                {'range': [50, 75], 'color': "lightblue"},
-                {'range': [75, 100], 'color': "blue"}
-            ],
-            'threshold': {
-                'line': {'color': "red", 'width': 4},
-                'thickness': 0.75,
-                'value': 90
-            }
-        }
-    ))
-    
-    fig.update_layout(
-        height=300,
-        margin=dict(l=20, r=20, t=40, b=20),
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)"
-    )
-    
-    return fig
+    return get_figure_factory().gauge(value, title, color)
 
 def create_bmi_indicator(bmi: float) -> go.Figure:
     """Crée un indicateur visuel pour l'IMC."""
-    # Déterminer la couleur basée sur l'IMC
-    if bmi < 18.5:
-        color = "#4CAF50"
-        category = "Insuffisance pondérale"
-    elif bmi < 25:
-        color = "#8BC34A"
-        category = "Poids normal"
-    elif bmi < 30:
-        color = "#FFC107"
-        category = "Surpoids"
-    else:
-        color = "#F44336"
-        category = "Obésité"
-    
-    fig = go.Figure(go.Indicator(
-        mode = "gauge+number",
-        value = bmi,
-        domain = {'x': [0, 1], 'y': [0, 1]},
-        title = {'text': f"IMC: {category}", 'font': {'size': 18}},
-        number = {'suffix': " kg/m²", 'font': {'size': 24}},
-        gauge = {
-            'axis': {'range': [15, 40], 'tickwidth': 1},
-            'bar': {'color': color, 'thickness': 0.3},
-            'steps': [
-                {'range': [15, 18.5], 'color': "#E3F2FD"},
-                {'range': [18.5, 25], 'color': "#C8E6C9"},
-                {'range': [25, 30], 'color': "#FFF3E0"},
-                {'range': [30, 40], 'color': "#FFEBEE"}
-            ],
-            'threshold': {
-                'line': {'color': "red", 'width': 4},
-                'thickness': 0.75,
-                'value': bmi
-            }
-        }
-    ))
-    
-    fig.update_layout(
-        height=250,
-        margin=dict(l=20, r=20, t=40, b=20),
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)"
-    )
-    
-    return fig
+    return get_figure_factory().bmi_indicator(bmi)
 
 def create_prediction_chart(probabilities: np.ndarray, labels: Dict[int, str]) -> go.Figure:
     """Crée un graphique en barres pour les probabilités de prédiction."""
-    df = pd.DataFrame({
-        'Catégorie': [labels[i] for i in range(len(probabilities))],
-        'Probabilité': probabilities * 100
-    })
-    
-    # Trier par probabilité décroissante
-    df = df.sort_values('Probabilité', ascending=True)
-    
-    # Couleurs dégradées
-    colors = px.colors.sequential.Reds_r
-    
-    fig = go.Figure(data=[
-        go.Bar(
-            y=df['Catégorie'],
-            x=df['Probabilité'],
-            orientation='h',
-            marker=dict(
-                color=df['Probabilité'],
-                colorscale='RdYlGn_r',
-                showscale=False
-            ),
-            text=[f"{p:.1f}%" for p in df['Probabilité']],
-            textposition='auto'
-        )
-    ])
-    
-    fig.update_layout(
-        title="Probabilités de classification",
-        xaxis_title="Probabilité (%)",
-        yaxis_title="Catégorie d'obésité",
-        height=400,
-        margin=dict(l=20, r=20, t=40, b=20),
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)"
-    )
-    
-    return fig
+    return get_figure_factory().prediction_chart(probabilities, labels)
+
+def create_sensitivity_chart(curves: pd.DataFrame, classes: List[str], labels: Dict[str, str],
+                             features: Dict[str, Dict[str, Any]]) -> go.Figure:
+    """Crée le graphique de sensibilité de la prédiction aux variables choisies."""
+    return get_figure_factory().sensitivity_chart(curves, classes, labels, features)
 
 def display_shap_explanation(model, input_data: pd.DataFrame, feature_names: List[str]):
     """Affiche l'explication SHAP pour la prédiction."""
@@ -159,6 +256,66 @@ def display_shap_explanation(model, input_data: pd.DataFrame, feature_names: Lis
         except:
             st.info("Explication SHAP non disponible")
 
+def display_shap_explorer(store, labels: Dict[str, str], fallback_image: str, max_display: int = 15):
+    """Explore la matrice SHAP pré-calculée par classe, genre et tranche d'IMC."""
+    if store is None:
+        st.info("Matrice SHAP absente ou calculée pour un autre modèle (python src/shap_store.py) : "
+                "affichage du résumé statique.")
+        try:
+            st.image(Image.open(fallback_image), caption="Importance des caractéristiques (SHAP)")
+        except Exception:
+            st.info("Explication SHAP non disponible")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        class_name = st.selectbox("Classe", [None] + store.classes, key="shap_class",
+                                  format_func=lambda c: "Toutes les classes" if c is None else labels.get(c, c))
+    with col2:
+        genre = st.selectbox("Genre", [None] + sorted(store.rows['genre'].unique()), key="shap_genre",
+                             format_func=lambda g: "Tous" if g is None else g)
+    with col3:
+        bands = [b for b in pd.unique(store.rows['tranche_imc'])]
+        bmi_band = st.selectbox("Tranche d'IMC", [None] + sorted(bands), key="shap_bmi",
+                                format_func=lambda b: "Toutes" if b is None else b)
+    
+    importance = store.mean_abs(class_name, genre, bmi_band).head(max_display)[::-1]
+    n_rows = int(store.row_mask(genre, bmi_band, class_name).sum())
+    fig = go.Figure(go.Bar(x=importance.values, y=importance.index, orientation='h',
+                           marker=dict(color='#FF6B6B')))
+    fig.update_layout(
+        title=f"Moyenne |SHAP| sur {n_rows} profils du jeu de test",
+        xaxis_title="Moyenne |SHAP|",
+        height=450,
+        margin=dict(l=20, r=20, t=40, b=20),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def display_local_explanation(contributions: pd.Series, class_label: str, max_display: int = 10):
+    """Affiche les contributions SHAP du profil pour la classe prédite."""
+    top = contributions.head(max_display)[::-1]
+    colors = ['#FF6B6B' if v > 0 else '#4ECDC4' for v in top.values]
+    fig = go.Figure(go.Bar(x=top.values, y=top.index, orientation='h', marker=dict(color=colors)))
+    fig.update_layout(
+        title=f"Contributions à la classe « {class_label} »",
+        xaxis_title="Valeur SHAP (rouge : pousse vers cette classe)",
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def display_shap_fallback(fallback_image: str, reason: str):
+    """Affiche le résumé SHAP statique quand l'explication individuelle n'est pas disponible."""
+    st.info(f"Explication individuelle indisponible ({reason}) : affichage du résumé global.")
+    try:
+        st.image(Image.open(fallback_image), caption="Importance des caractéristiques (SHAP)")
+    except Exception:
+        st.info("Explication SHAP non disponible")
+
 def create_risk_assessment_card(risk_factors: List[str], protective_factors: List[str]):
     """Crée une carte d'évaluation des risques."""
     col1, col2 = st.columns(2)
@@ -243,6 +400,112 @@ def display_model_info():
         Cette application est à des fins éducatives et ne remplace pas un avis médical professionnel.
         """)
 
+def display_evaluation_report(report: Dict[str, Any], labels: Dict[str, str]):
+    """Affiche le rapport d'évaluation du modèle déployé sur le jeu de test (voir evaluation.py)."""
+    # Classes dans l'ordre de sévérité des libellés
+    order = [report['classes'].index(c) for c in labels if c in report['classes']]
+    names = [labels[report['classes'][i]] for i in order]
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("⚖️ Balanced accuracy", f"{report['balanced_accuracy']*100:.1f}%")
+    with col2:
+        st.metric("🎯 Exactitude", f"{report['accuracy']*100:.1f}%")
+    with col3:
+        st.metric("📉 Score de Brier", f"{report['brier']:.3f}")
+    with col4:
+        st.metric("📐 Erreur de calibration (ECE)", f"{report['ece']*100:.1f}%")
+    st.caption(f"{report['n_samples']} profils de X_test, évalués le {report['evaluated_at']} "
+               f"(modèle {report['model_hash'][:12]})")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        confusion = np.asarray(report['confusion'], dtype=float)[np.ix_(order, order)]
+        rates = np.divide(confusion, confusion.sum(axis=1, keepdims=True),
+                          out=np.zeros_like(confusion), where=confusion.sum(axis=1, keepdims=True) > 0)
+        fig = go.Figure(go.Heatmap(
+            z=rates * 100, x=names, y=names, colorscale="Blues", zmin=0, zmax=100,
+            text=confusion.astype(int), texttemplate="%{text}", hovertemplate="%{y} → %{x} : %{z:.1f}%"
+        ))
+        fig.update_layout(title="Matrice de confusion (% de la classe réelle)", height=450,
+                          xaxis_title="Classe prédite", yaxis_title="Classe réelle",
+                          yaxis_autorange="reversed", margin=dict(l=20, r=20, t=40, b=20))
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        fig = go.Figure(go.Scatter(x=[0, 1], y=[0, 1], mode="lines", name="Calibration parfaite",
+                                   line=dict(color="gray", dash="dash")))
+        for i, name in zip(order, names):
+            curve = report['reliability'][report['classes'][i]]
+            filled = np.asarray(curve['count']) > 0
+            fig.add_trace(go.Scatter(
+                x=np.asarray(curve['mean_predicted'])[filled], y=np.asarray(curve['observed'])[filled],
+                mode="lines+markers", name=name
+            ))
+        fig.update_layout(title="Courbes de fiabilité (un contre tous)", height=450,
+                          xaxis_title="Probabilité prédite", yaxis_title="Fréquence observée",
+                          margin=dict(l=20, r=20, t=40, b=20))
+        st.plotly_chart(fig, use_container_width=True)
+    
+    per_class = pd.DataFrame(report['per_class']).iloc[order]
+    per_class['classe'] = names
+    st.dataframe(
+        per_class.rename(columns={'classe': 'Classe', 'precision': 'Précision', 'recall': 'Rappel',
+                                  'f1': 'F1', 'support': 'Effectif', 'brier': 'Brier'}).round(3),
+        use_container_width=True, hide_index=True
+    )
+
+def display_similar_profiles(profiles: pd.DataFrame, class_mix: Dict[str, float], labels: Dict[str, str]):
+    """Affiche les profils similaires du dataset et la répartition de leurs classes."""
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        columns = ['distance', 'genre', 'age', 'taille_m', 'poids_kg',
+                   'activite_physique_hebdo', 'transport', 'obesite_label']
+        table = profiles[[c for c in columns if c in profiles.columns]].copy()
+        table['obesite_label'] = table['obesite_label'].map(lambda l: labels.get(l, l))
+        st.dataframe(table.round(2), use_container_width=True, hide_index=True)
+    
+    with col2:
+        st.markdown(f"**Classes des {len(profiles)} profils les plus proches**")
+        for label, share in sorted(class_mix.items(), key=lambda item: -item[1]):
+            st.progress(float(share), text=f"{labels.get(label, label)} : {share*100:.0f}%")
+
+def display_counterfactuals(suggestions: List[Dict[str, Any]], labels: Dict[str, str]):
+    """Affiche les plus petits changements qui feraient baisser la classe prédite."""
+    if not suggestions:
+        st.info("Aucun petit changement de mode de vie ne suffit à changer de classe : "
+                "suivez les recommandations ci-dessus sur la durée.")
+        return
+    
+    for i, suggestion in enumerate(suggestions, 1):
+        changes = " et ".join(
+            f"**{c['label']}** : {c['old']} → {c['new']} {c['unit']}".rstrip()
+            for c in suggestion['changes']
+        )
+        target = labels.get(suggestion['target_class'], suggestion['target_class'])
+        st.markdown(f"{i}. {changes} — classe estimée **{target}** "
+                    f"({suggestion['probability']*100:.0f}% de probabilité)")
+
+def create_analysis_filters(categories: Dict[str, List[str]],
+                            dimension_labels: Dict[str, str]) -> Tuple[Dict[str, List[str]], Optional[str]]:
+    """Crée les filtres de la page d'analyse et le choix de la dimension de ventilation."""
+    filters = {}
+    with st.expander("🔎 Filtres", expanded=False):
+        dims = [d for d in categories if d != "obesite_label"]
+        cols = st.columns(3)
+        for i, dim in enumerate(dims):
+            with cols[i % 3]:
+                filters[dim] = st.multiselect(dimension_labels.get(dim, dim), categories[dim],
+                                              key=f"analysis_filter_{dim}")
+
+    breakdown = st.selectbox(
+        "Ventiler par",
+        [None] + dims,
+        format_func=lambda d: "Aucune ventilation" if d is None else dimension_labels.get(d, d),
+        key="analysis_breakdown"
+    )
+    return {dim: values for dim, values in filters.items() if values}, breakdown
+
 def create_input_form() -> Dict[str, Any]:
     """Crée le formulaire de saisie des données utilisateur."""
     st.markdown("### 📝 Vos informations")
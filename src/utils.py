@@ -1,8 +1,9 @@
+import hashlib
 import pickle
 import pandas as pd
 import numpy as np
 import streamlit as st
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import os
 import joblib
 
@@ -25,6 +26,96 @@ def load_data(data_path: str) -> pd.DataFrame:
         st.error(f"Erreur lors du chargement des données: {e}")
         return pd.DataFrame()
 
+def hash_path(path: str) -> Optional[str]:
+    """Empreinte SHA-256 du contenu d'un fichier ou d'un répertoire (None s'il n'existe pas)."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for directory, dirs, files in sorted(os.walk(path)):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(directory, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update(hash_path(file_path).encode())
+        return digest.hexdigest()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Écart maximal toléré lors du passage d'une colonne en float32 (les données ont 2 décimales)
+FLOAT32_TOLERANCE = 1e-4
+# Une colonne texte devient catégorielle si elle a au plus cette proportion de valeurs distinctes
+CATEGORY_MAX_RATIO = 0.5
+
+def _freeze(values: np.ndarray) -> np.ndarray:
+    """Marque un tableau en lecture seule pour qu'il puisse être partagé sans copie."""
+    values = np.ascontiguousarray(values)
+    values.flags.writeable = False
+    return values
+
+def compact_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Retourne une copie compacte et en lecture seule d'un DataFrame.
+
+    Les entiers sont réduits au plus petit type suffisant, les flottants passent en
+    float32 lorsque l'arrondi reste sous FLOAT32_TOLERANCE, et les colonnes texte peu
+    variées deviennent catégorielles. Toute écriture dans le résultat lève une ValueError.
+    """
+    columns = {}
+    for name in frame.columns:
+        series = frame[name]
+        if pd.api.types.is_bool_dtype(series):
+            columns[name] = _freeze(series.to_numpy())
+        elif pd.api.types.is_integer_dtype(series):
+            columns[name] = _freeze(pd.to_numeric(series, downcast='integer').to_numpy())
+        elif pd.api.types.is_float_dtype(series):
+            values = series.to_numpy(dtype=np.float64)
+            narrow = values.astype(np.float32)
+            if np.allclose(narrow, values, rtol=0, atol=FLOAT32_TOLERANCE, equal_nan=True):
+                values = narrow
+            columns[name] = _freeze(values)
+        elif series.nunique(dropna=True) <= CATEGORY_MAX_RATIO * max(len(series), 1):
+            categorical = pd.Categorical(series)
+            columns[name] = pd.Categorical.from_codes(
+                _freeze(categorical.codes), dtype=categorical.dtype, validate=False
+            )
+        else:
+            columns[name] = series.copy()
+    return pd.DataFrame(columns, index=frame.index, copy=False)
+
+@st.cache_resource
+def load_shared_data(data_path: str) -> pd.DataFrame:
+    """Charge le dataset une seule fois par processus, en version compacte partagée.
+
+    Contrairement à load_data (st.cache_data renvoie une copie à chaque appel), toutes
+    les sessions reçoivent le même objet en lecture seule : faire .copy() avant de le modifier.
+    """
+    try:
+        return compact_frame(pd.read_csv(data_path))
+    except Exception as e:
+        st.error(f"Erreur lors du chargement des données: {e}")
+        return pd.DataFrame()
+
+def get_pipeline(model):
+    """Retourne le pipeline ajusté (preprocess + model), y compris derrière une calibration.
+
+    Pour une cascade (cascade.CascadeClassifier), c'est le pipeline du modèle expert.
+    """
+    if hasattr(model, "expert"):
+        model = model.expert
+    if hasattr(model, "calibrated_classifiers_"):
+        model = model.calibrated_classifiers_[0].estimator
+    elif hasattr(model, "estimator") and not hasattr(model, "named_steps"):
+        model = model.estimator
+    if hasattr(model, "named_steps") and "preprocess" in model.named_steps:
+        return model
+    raise ValueError("Aucune étape 'preprocess' trouvée dans le modèle")
+
+def get_preprocessor(model):
+    """Retourne le ColumnTransformer ajusté du pipeline (calibré ou non)."""
+    return get_pipeline(model).named_steps["preprocess"]
+
 def calculate_bmi(weight: float, height: float) -> float:
     """Calcule l'IMC (Indice de Masse Corporelle)."""
     if height <= 0:
@@ -42,37 +133,52 @@ def get_bmi_category(bmi: float) -> str:
     else:
         return "Obésité"
 
-def prepare_input_data(user_inputs: Dict[str, Any]) -> pd.DataFrame:
-    """Prépare les données d'entrée pour la prédiction."""
-    # Convertir les valeurs catégorielles en valeurs numériques pour les colonnes qui l'exigent
-    def convert_yes_no_to_numeric(value):
-        if isinstance(value, str):
-            return 1 if value.lower() in ['oui', 'yes', 'true'] else 0
-        return int(bool(value))
+def convert_yes_no_to_numeric(value) -> int:
+    """Convertit une réponse Oui/Non (ou booléenne) en 0/1."""
+    if isinstance(value, str):
+        return 1 if value.lower() in ['oui', 'yes', 'true'] else 0
+    return int(bool(value))
+
+# Libellés du formulaire traduits vers les modalités vues par le modèle à l'entraînement
+FORM_TO_MODEL_CATEGORIES = {
+    'grignotage': {'Souvent': 'Fréquemment'},
+    'alcool': {'Souvent': 'Fréquemment', 'Toujours': 'Fréquemment'},
+    'transport': {'Transport_Public': 'Transports_Publics', 'Automobile': 'Voiture'}
+}
+
+def to_model_category(column: str, value: Any) -> Any:
+    """Traduit une modalité du formulaire dans le vocabulaire du modèle."""
+    return FORM_TO_MODEL_CATEGORIES.get(column, {}).get(value, value)
+
+def prepare_input_batch(inputs: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Prépare plusieurs profils utilisateur en un seul DataFrame pour une prédiction groupée."""
+    legumes = [i['consommation_legumes'] for i in inputs]
     
     # Créer un DataFrame avec les colonnes attendues par le modèle
-    data = pd.DataFrame({
-        'identifiant': [0],  # Valeur par défaut
-        'age': [user_inputs['age']],
-        'taille_m': [user_inputs['taille_m']],
-        'poids_kg': [user_inputs['poids_kg']],
-        'antecedents_surpoids_famille': [convert_yes_no_to_numeric(user_inputs['antecedents_familiaux'])],
-        'consommation_frequent_calorique': [1 if user_inputs['consommation_legumes'] >= 3 else 0],
-        'frequence_legumes': [user_inputs['consommation_legumes']],
-        'nombre_repas_jour': [user_inputs['nombre_repas_principaux']],
-        'fumeur': [convert_yes_no_to_numeric(user_inputs['fumeur'])],
-        'eau_litres_jour': [user_inputs['consommation_eau']],
-        'suivi_calories': [convert_yes_no_to_numeric(user_inputs['surveillance_calories'])],
-        'activite_physique_hebdo': [user_inputs['frequence_activite_physique']],
-        'temps_ecran': [user_inputs['temps_technologie']],
+    return pd.DataFrame({
+        'identifiant': [0] * len(inputs),  # Valeur par défaut
+        'age': [i['age'] for i in inputs],
+        'taille_m': [i['taille_m'] for i in inputs],
+        'poids_kg': [i['poids_kg'] for i in inputs],
+        'antecedents_surpoids_famille': [convert_yes_no_to_numeric(i['antecedents_familiaux']) for i in inputs],
+        'consommation_frequent_calorique': [1 if l >= 3 else 0 for l in legumes],
+        'frequence_legumes': legumes,
+        'nombre_repas_jour': [i['nombre_repas_principaux'] for i in inputs],
+        'fumeur': [convert_yes_no_to_numeric(i['fumeur']) for i in inputs],
+        'eau_litres_jour': [i['consommation_eau'] for i in inputs],
+        'suivi_calories': [convert_yes_no_to_numeric(i['surveillance_calories']) for i in inputs],
+        'activite_physique_hebdo': [i['frequence_activite_physique'] for i in inputs],
+        'temps_ecran': [i['temps_technologie'] for i in inputs],
         # Colonnes catégorielles (gardées comme strings pour OneHotEncoder)
-        'genre': [user_inputs['genre']],
-        'grignotage': [user_inputs['grignotage']],
-        'alcool': [user_inputs['alcool']],
-        'transport': [user_inputs['transport']]
+        'genre': [i['genre'] for i in inputs],
+        'grignotage': [to_model_category('grignotage', i['grignotage']) for i in inputs],
+        'alcool': [to_model_category('alcool', i['alcool']) for i in inputs],
+        'transport': [to_model_category('transport', i['transport']) for i in inputs]
     })
-    
-    return data
+
+def prepare_input_data(user_inputs: Dict[str, Any]) -> pd.DataFrame:
+    """Prépare les données d'entrée pour la prédiction."""
+    return prepare_input_batch([user_inputs])
 
 def get_obesity_labels() -> Dict[str, str]:
     """Retourne le mapping des labels d'obésité du modèle vers les labels d'affichage."""
@@ -0,0 +1,226 @@
+import atexit
+import json
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+import streamlit as st
+from streamlit.logger import get_logger
+from typing import Any, Callable, Dict
+
+try:
+    from utils import load_shared_data, get_obesity_labels_numeric, get_preprocessor
+    from advice_engine import AdviceEngine
+    from ui_components import get_figure_factory, create_bmi_indicator, create_prediction_chart
+    from prediction import predict_profile, compute_counterfactuals
+    from shap_store import load_shap_store, load_local_explainer, explain_instance
+    from neighbors_index import load_neighbors_index, find_similar_profiles
+    from analysis_cube import load_analysis_cube
+    from cascade import load_inference_model
+    from sensitivity import compute_sensitivity
+    from evaluation import load_evaluation_report
+    from feature_store import load_feature_matrix
+except ImportError:
+    from src.utils import load_shared_data, get_obesity_labels_numeric, get_preprocessor
+    from src.advice_engine import AdviceEngine
+    from src.ui_components import get_figure_factory, create_bmi_indicator, create_prediction_chart
+    from src.prediction import predict_profile, compute_counterfactuals
+    from src.shap_store import load_shap_store, load_local_explainer, explain_instance
+    from src.neighbors_index import load_neighbors_index, find_similar_profiles
+    from src.analysis_cube import load_analysis_cube
+    from src.cascade import load_inference_model
+    from src.sensitivity import compute_sensitivity
+    from src.evaluation import load_evaluation_report
+    from src.feature_store import load_feature_matrix
+
+# Nombre de profils de X_test passés dans le chemin de prédiction complet
+WARMUP_SAMPLES = 8
+# Mode d'inférence : "lgbm" (LightGBM calibré seul) ou "cascade" (logistique puis LightGBM si besoin)
+INFERENCE_MODE = os.environ.get("OBESITE_INFERENCE_MODE", "lgbm")
+# Fichier de disponibilité lu par l'orchestrateur (sonde readiness) ; surchargeable par variable d'environnement.
+# Par défaut un fichier par port d'écoute, pour que deux réplicas d'une même machine ne se confondent pas.
+READY_FILE_TEMPLATE = os.path.join(tempfile.gettempdir(), "obesite_app.{port}.ready")
+
+# Modalités du dataset traduites vers les choix du formulaire (Moto n'y figure pas)
+MODEL_TO_FORM_CATEGORIES = {
+    'grignotage': {'Fréquemment': 'Souvent'},
+    'alcool': {'Fréquemment': 'Souvent'},
+    'transport': {'Transports_Publics': 'Transport_Public', 'Voiture': 'Automobile', 'Moto': 'Automobile'}
+}
+
+logger = get_logger(__name__)
+
+def app_paths(root: str) -> Dict[str, str]:
+    """Chemins des ressources de l'application, tels que les construit app_obesite."""
+    return {
+        'model': os.path.join(root, "models", "modele_lgbm.pkl"),
+        'data': os.path.join(root, "data", "obesite_clean_fr.csv"),
+        'samples': os.path.join(root, "data", "X_test.csv"),
+        'labels': os.path.join(root, "data", "y_test.csv"),
+        'evaluation': os.path.join(root, "models", "evaluation.json"),
+        'neighbors_index': os.path.join(root, "models", "neighbors_index"),
+        'features': os.path.join(root, "models", "features"),
+        'shap_values': os.path.join(root, "assets", "shap_values")
+    }
+
+def row_to_user_inputs(row: pd.Series) -> Dict[str, Any]:
+    """Convertit une ligne du dataset en réponses du formulaire (create_input_form)."""
+    def slider(value, low, high):
+        return int(min(high, max(low, round(float(value)))))
+
+    def yes_no(value):
+        return "Oui" if int(value) == 1 else "Non"
+
+    def category(column):
+        return MODEL_TO_FORM_CATEGORIES[column].get(row[column], row[column])
+
+    return {
+        'genre': row['genre'],
+        'age': int(row['age']),
+        'taille_m': float(row['taille_m']),
+        'poids_kg': float(row['poids_kg']),
+        'antecedents_familiaux': yes_no(row['antecedents_surpoids_famille']),
+        'consommation_legumes': slider(row['frequence_legumes'], 0, 5),
+        'nombre_repas_principaux': slider(row['nombre_repas_jour'], 1, 5),
+        'grignotage': category('grignotage'),
+        'fumeur': yes_no(row['fumeur']),
+        'consommation_eau': slider(row['eau_litres_jour'], 0, 5),
+        'surveillance_calories': yes_no(row['suivi_calories']),
+        'frequence_activite_physique': slider(row['activite_physique_hebdo'], 0, 7),
+        'temps_technologie': slider(row['temps_ecran'], 0, 12),
+        'alcool': category('alcool'),
+        'transport': category('transport')
+    }
+
+@st.cache_resource
+def load_app_resources(model_path: str):
+    """Charge le modèle et le moteur de conseils une seule fois par processus."""
+    return load_inference_model(model_path, INFERENCE_MODE), AdviceEngine()
+
+def _timed(timings: Dict[str, float], name: str, step: Callable[[], Any], required: bool = False) -> Any:
+    """Exécute une étape de préchauffage et cumule sa durée ; seules les étapes requises peuvent échouer.
+
+    Les étapes répétées (une par profil) totalisent leurs durées sous le même nom.
+    """
+    start = time.perf_counter()
+    try:
+        return step()
+    except Exception as e:
+        if required:
+            raise
+        logger.warning("Préchauffage : étape %s ignorée (%s)", name, e)
+        return None
+    finally:
+        timings[name] = round(timings.get(name, 0.0) + (time.perf_counter() - start) * 1e3, 1)
+
+def ready_file() -> str:
+    """Fichier de disponibilité de ce réplica : $OBESITE_READY_FILE, sinon un fichier par port du serveur."""
+    return os.environ.get("OBESITE_READY_FILE") or READY_FILE_TEMPLATE.format(port=st.config.get_option("server.port"))
+
+def _remove_ready_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+@st.cache_resource(show_spinner=False)
+def warm_up(root: str) -> Dict[str, Any]:
+    """Charge toutes les ressources et fait passer des profils de X_test par le chemin de prédiction.
+
+    Exécuté une fois par processus ; écrit ready_file() à la fin et journalise le temps
+    de mise à disposition. Retourne la durée de chaque étape en millisecondes (cumulée sur
+    les profils pour les étapes répétées). Un échec est mis en cache comme le succès : la clé
+    'erreur' signale une application dégradée, sans relancer le préchauffage à chaque rerun.
+    """
+    start = time.perf_counter()
+    path = ready_file()
+    _remove_ready_file(path)
+    timings: Dict[str, Any] = {}
+    try:
+        _warm_up_steps(app_paths(root), timings)
+    except Exception as e:
+        timings['erreur'] = str(e)
+        logger.error("Préchauffage interrompu, application dégradée : %s", e)
+
+    timings['total'] = round((time.perf_counter() - start) * 1e3, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"pid": os.getpid(), "ready_at": time.time(), "degraded": 'erreur' in timings,
+                   "timings_ms": timings}, f, indent=2)
+    atexit.register(_remove_ready_file, path)
+    logger.info("Application prête en %.1f s (%d profils de préchauffage) : %s",
+                timings['total'] / 1e3, WARMUP_SAMPLES, timings)
+    return timings
+
+def _warm_up_steps(paths: Dict[str, str], timings: Dict[str, Any]):
+    """Étapes du préchauffage ; une étape requise qui échoue l'interrompt."""
+    model, advice_engine = _timed(timings, "modele", lambda: load_app_resources(paths['model']), required=True)
+    if model is None:
+        raise RuntimeError(f"Modèle introuvable : {paths['model']}")
+    data = _timed(timings, "dataset", lambda: load_shared_data(paths['data']), required=True)
+    _timed(timings, "cube_analyse", lambda: load_analysis_cube(paths['data']))
+    _timed(timings, "matrice_shap", lambda: load_shap_store(model, paths['shap_values']))
+    _timed(timings, "matrice_features", lambda: load_feature_matrix(model, paths['data'], paths['features']))
+    index = _timed(timings, "index_voisins", lambda: load_neighbors_index(
+        model, paths['data'], paths['neighbors_index'], paths['features']))
+    explainer = _timed(timings, "explainer_shap", lambda: load_local_explainer(model, paths['data'], paths['features']))
+    _timed(timings, "figures", get_figure_factory)
+    _timed(timings, "evaluation", lambda: load_evaluation_report(
+        model, paths['model'], paths['samples'], paths['labels'], paths['evaluation']))
+
+    samples = pd.read_csv(paths['samples']).sample(n=WARMUP_SAMPLES, random_state=0)
+    numeric_labels = get_obesity_labels_numeric()
+    for _, row in samples.iterrows():
+        user_inputs = row_to_user_inputs(row)
+        # Même enchaînement que prediction_page, sans l'affichage
+        result = _timed(timings, "prediction", lambda: predict_profile(model, user_inputs), required=True)
+        prediction = result['prediction']
+        advice_engine.get_risk_factors(user_inputs)
+        advice_engine.get_protective_factors(user_inputs)
+        advice_engine.get_personalized_advice(result['prediction_index'], user_inputs)
+        create_bmi_indicator(result['bmi']).to_json()
+        create_prediction_chart(result['probabilities'], numeric_labels).to_json()
+        _timed(timings, "sensibilite", lambda: compute_sensitivity(model, user_inputs))
+        if isinstance(prediction, str):
+            if explainer is not None:
+                _timed(timings, "explication",
+                       lambda: explain_instance(explainer, model, result['input_data'], prediction))
+            _timed(timings, "contrefactuels", lambda: compute_counterfactuals(model, user_inputs, prediction))
+        if index is not None:
+            _timed(timings, "voisins", lambda: find_similar_profiles(
+                index, get_preprocessor(model), result['input_data'], data))
+
+def main():
+    import argparse
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(
+        description="Préchauffe l'application, puis la lance avec --serve (arguments suivants transmis à streamlit run).",
+        epilog="Seul mode de disponibilité pris en charge : avec --serve, le serveur n'écoute et le fichier "
+               "de disponibilité n'existe qu'après le préchauffage. Sous « streamlit run », le préchauffage "
+               "n'a lieu qu'à la première visite : ne pas y attendre le fichier avant d'envoyer du trafic."
+    )
+    parser.add_argument("--serve", action="store_true")
+    args, streamlit_args = parser.parse_known_args()
+
+    app_path = os.path.join(root, "src", "app_obesite.py")
+    # Port transmis à streamlit run (« --server.port 8502 » ou « --server.port=8502 ») : appliqué
+    # dès maintenant pour nommer le fichier de disponibilité
+    port_parser = argparse.ArgumentParser(prog="streamlit run", add_help=False, allow_abbrev=False)
+    port_parser.add_argument("--server.port", dest="port", type=int)
+    port = port_parser.parse_known_args(streamlit_args)[0].port
+    if port is not None:
+        st.config.set_option("server.port", port)
+    # Avec --serve, le serveur (et donc /_stcore/health) n'écoute qu'après le préchauffage
+    timings = warm_up(root)
+    if 'erreur' in timings:
+        print(f"⚠️ Préchauffage incomplet ({timings['erreur']}) — application dégradée")
+    print(f"✅ Application prête en {timings['total'] / 1e3:.1f} s — {ready_file()}")
+
+    if args.serve:
+        from streamlit.web import cli as stcli
+        sys.argv = ["streamlit", "run", app_path] + streamlit_args
+        sys.exit(stcli.main())
+
+if __name__ == "__main__":
+    # Ré-importé sous son nom de module pour que l'application retrouve les mêmes caches
+    import warmup
+    warmup.main()
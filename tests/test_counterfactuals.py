@@ -0,0 +1,37 @@
+"""Suggestions contrefactuelles : seules les classes de « Poids normal » à la classe actuelle sont visées."""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from counterfactuals import CounterfactualEngine  # noqa: E402
+from prediction import compute_counterfactuals  # noqa: E402
+from utils import get_obesity_labels  # noqa: E402
+from test_schema import PROFILE  # noqa: E402
+
+class ActivityModel:
+    """Stub : plus d'activité physique fait passer en insuffisance pondérale, sinon surpoids niveau I."""
+
+    classes_ = np.array(list(get_obesity_labels()), dtype=object)
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        probabilities = np.full((len(X), len(self.classes_)), 0.01)
+        more_active = X["activite_physique_hebdo"].to_numpy() > PROFILE["frequence_activite_physique"]
+        probabilities[np.arange(len(X)), np.where(more_active, 0, 2)] = 0.94
+        return probabilities
+
+def test_underweight_is_not_an_improvement():
+    assert CounterfactualEngine(ActivityModel()).suggest(PROFILE, "Surpoids_Niveau_I") == []
+
+def test_no_search_from_normal_weight():
+    model = ActivityModel()
+    assert compute_counterfactuals(model, PROFILE, "Poids_Normal") == []
+    assert compute_counterfactuals(model, PROFILE, "Insuffisance_Ponderale") == []
+    assert model.calls == 0
@@ -0,0 +1,92 @@
+"""Appels au modèle par interaction de la page Prédiction (streamlit.testing.v1.AppTest).
+
+Le modèle est remplacé par un stub qui compte ses appels à predict_proba, en séparant
+ceux du script (chemin du premier affichage) de ceux des sections d'arrière-plan.
+"""
+import sys
+import threading
+from concurrent.futures import wait
+from pathlib import Path
+
+import numpy as np
+import pytest
+from streamlit.testing.v1 import AppTest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+import warmup  # noqa: E402
+from advice_engine import AdviceEngine  # noqa: E402
+from progressive import get_background_executor  # noqa: E402
+from utils import get_obesity_labels  # noqa: E402
+
+APP_PATH = str(ROOT_DIR / "src" / "app_obesite.py")
+
+class CountingModel:
+    """Stub de modèle : probabilités fixes, appels à predict_proba comptés par thread."""
+
+    def __init__(self):
+        self.classes_ = np.array(list(get_obesity_labels()), dtype=object)
+        self.calls = []
+
+    def predict_proba(self, X):
+        self.calls.append(threading.current_thread().name)
+        probabilities = np.full((len(X), len(self.classes_)), 0.05)
+        probabilities[:, 2] = 1 - 0.05 * (len(self.classes_) - 1)
+        return probabilities
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def script_calls(self) -> int:
+        return sum(not name.startswith(get_background_executor()._thread_name_prefix) for name in self.calls)
+
+@pytest.fixture
+def app(monkeypatch):
+    model = CountingModel()
+    monkeypatch.setattr(warmup, "warm_up", lambda root: {})
+    monkeypatch.setattr(warmup, "load_app_resources", lambda model_path: (model, AdviceEngine()))
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.run()
+    return at, model
+
+def interact(at: AppTest, model: CountingModel, action) -> CountingModel:
+    """Joue une interaction, attend ses calculs d'arrière-plan et retourne les appels qu'elle a faits."""
+    model.calls.clear()
+    action()
+    assert not at.exception, at.exception[0].value
+    if "prediction_results" in at.session_state and "renderer" in at.session_state["prediction_results"]:
+        wait([section["future"] for section in at.session_state["prediction_results"]["renderer"].sections])
+    return model
+
+def test_submit_calls_predict_proba_once_on_the_script_path(app):
+    at, model = app
+    assert model.calls == []
+
+    interact(at, model, lambda: at.button[0].click().run())
+    assert model.script_calls() == 1
+    # Sensibilité et contrefactuels : appels faits par les sections d'arrière-plan
+    assert len(model.calls) > 1
+    assert at.metric[0].value == get_obesity_labels()[str(model.classes_[2])]
+
+@pytest.mark.parametrize("action", [
+    lambda at: at.number_input[2].set_value(95.0).run(),
+    lambda at: at.multiselect(key="sensitivity_features").set_value(["poids_kg"]).run(),
+    lambda at: at.button(key="save_results").click().run(),
+    lambda at: at.sidebar.radio[0].set_value("💡 Conseils").run(),
+], ids=["modifier_poids", "sensibilite", "sauvegarde", "page_conseils"])
+def test_unrelated_interactions_do_not_call_the_model(app, action):
+    at, model = app
+    interact(at, model, lambda: at.button[0].click().run())
+
+    interact(at, model, lambda: action(at))
+    assert model.calls == []
+
+def test_save_keeps_the_displayed_prediction(app):
+    at, model = app
+    interact(at, model, lambda: at.button[0].click().run())
+    interact(at, model, lambda: at.number_input[2].set_value(95.0).run())
+
+    interact(at, model, lambda: at.button(key="save_results").click().run())
+    displayed = at.session_state["prediction_results"]["result"]["predicted_label"]
+    assert [r["predicted_label"] for r in at.session_state["saved_results"]] == [displayed]
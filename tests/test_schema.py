@@ -0,0 +1,54 @@
+"""Schéma du modèle : erreurs bloquantes et avertissements hors plage d'entraînement."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from prediction import predict_profile  # noqa: E402
+from schema import OK, OUT_OF_TRAINING_RANGE, check_training_range, validate_frame  # noqa: E402
+from utils import get_obesity_labels, prepare_input_data  # noqa: E402
+
+PROFILE = {
+    'genre': 'Femme', 'age': 30, 'taille_m': 1.65, 'poids_kg': 62.0, 'antecedents_familiaux': 'Non',
+    'consommation_legumes': 2, 'nombre_repas_principaux': 3, 'grignotage': 'Parfois', 'fumeur': 'Non',
+    'consommation_eau': 2, 'surveillance_calories': 'Non', 'frequence_activite_physique': 1,
+    'temps_technologie': 1, 'alcool': 'Parfois', 'transport': 'Marche'
+}
+
+class FixedModel:
+    """Stub de modèle : même probabilité pour tout profil."""
+
+    classes_ = np.array(list(get_obesity_labels()), dtype=object)
+
+    def predict_proba(self, X):
+        return np.full((len(X), len(self.classes_)), 1 / len(self.classes_))
+
+def eau_code(consommation_eau: float) -> int:
+    frame = prepare_input_data(dict(PROFILE, consommation_eau=consommation_eau))
+    result = check_training_range(frame)
+    return int(result.codes[0, result.columns.index('eau_litres_jour')])
+
+def test_profile_within_training_range_is_not_flagged():
+    frame = prepare_input_data(PROFILE)
+    assert validate_frame(frame).valid_rows.all()
+    assert not check_training_range(frame).codes.any()
+
+@pytest.mark.parametrize("consommation_eau", [4, 5])
+def test_water_above_training_range_is_flagged(consommation_eau):
+    # Admise par le formulaire (0-5), mais le modèle n'a vu que 1 à 3 L/jour
+    frame = prepare_input_data(dict(PROFILE, consommation_eau=consommation_eau))
+    assert validate_frame(frame).valid_rows.all()
+    assert eau_code(consommation_eau) == OUT_OF_TRAINING_RANGE
+
+@pytest.mark.parametrize("consommation_eau", [1, 3])
+def test_water_at_training_bounds_is_not_flagged(consommation_eau):
+    assert eau_code(consommation_eau) == OK
+
+def test_predict_profile_reports_out_of_range_values():
+    result = predict_profile(FixedModel(), dict(PROFILE, consommation_eau=5))
+    assert result['range_warnings'] == ["eau_litres_jour : valeur hors de la plage d'entraînement du modèle"]
+    assert predict_profile(FixedModel(), PROFILE)['range_warnings'] == []